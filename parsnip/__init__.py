@@ -3,6 +3,6 @@
 
 """``parsnip``: a package for the simple reading and processing of .cif files."""
 
-from .parsnip import CifFile
+from .parsnip import CifFile, build_index, iter_blocks, iterparse
 
 __version__ = "1.0.0"
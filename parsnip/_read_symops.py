@@ -4,15 +4,18 @@
 """Parse and process the OpenBabel space groups database.
 
 Similar to *gemmi*, we use this as a complete reference for the 530+ standard space
-groups and settings. This data is processed into json, which is used when CIF files do
-not store their own symmetry operations. Note that we cross-reference against [Table 6
-from this site](https://cci.lbl.gov/sginfo/hall_symbols.html) to determine the standard
-setting
+groups and settings. This data is processed into a set of binary tables, which are
+used when CIF files do not store their own symmetry operations. Note that we
+cross-reference against [Table 6 from this
+site](https://cci.lbl.gov/sginfo/hall_symbols.html) to determine the standard setting
 
 https://github.com/openbabel/openbabel/blob/889c350feb179b43aa43985799910149d4eaa2bc/data/space-groups.txt
 """
 
 import re
+from pathlib import Path
+
+import numpy as np
 
 
 def build_sg_dict(openbabel_db_path, crossref_db_path):
@@ -77,16 +80,94 @@ def build_sg_dict(openbabel_db_path, crossref_db_path):
     return spacegroup_data
 
 
-if __name__ == "__main__":
-    import json
+def write_sg_database(spacegroup_data, output_dir):
+    """Write the processed space group dict to memory-mappable ``.npy`` tables.
 
-    OUTPUT_FN = "parsnip/symops.json"
-    INPUT_FN = "space-groups.txt"
+    Three arrays are written. ``spacegroups.npy`` has one row per setting, ordered such
+    that default settings come last, with the normalized Hermann-Mauguin lookup keys of
+    each setting and the range of its rows in ``spacegroup_symops.npy``. That file
+    holds the index of each operation of each setting into ``symops.npy``, which has
+    one row per distinct symmetry operation with the operation string, its integer
+    rotation matrix, and the numerators and denominators of its translation. Strings
+    are stored as ASCII bytes, which take a quarter of the space of unicode.
+    """
+    from parsnip.patterns import _normalize, _parse_symop
+
+    # Default settings go last, so that ambiguous lookups resolve to them
+    items = sorted(spacegroup_data.items(), key=lambda kv: kv[1]["is_default_setting"])
+    counts = [len(data["symops"]) for _, data in items]
+
+    # Most operations are shared between settings, so each is only stored once
+    symops = list(dict.fromkeys(s for _, data in items for s in data["symops"]))
+    index = {symop: i for i, symop in enumerate(symops)}
+    setting_symops = np.array(
+        [index[symop] for _, data in items for symop in data["symops"]], dtype="<i2"
+    )
+
+    def width(strings):
+        return f"S{max(len(string or '') for string in strings)}"
+
+    hm_keys = [
+        [
+            _normalize(hm)
+            for hm in (
+                data["hermann_mauguin_full"],
+                data["hermann_mauguin_full"].split(":")[0],
+                data["hermann_mauguin_short"],
+                data["hermann_mauguin_short"].split(":")[0],
+            )
+        ]
+        for _, data in items
+    ]
+    names = [
+        "table_number",
+        "tables_number_with_setting",
+        "hermann_mauguin_short",
+        "hermann_mauguin_full",
+    ]
+    settings = np.empty(
+        len(items),
+        dtype=[
+            ("hall", width(hall for hall, _ in items)),
+            *((name, width(data[name] for _, data in items)) for name in names),
+            ("is_default_setting", "?"),
+            ("hm_keys", width(key for keys in hm_keys for key in keys), (4,)),
+            ("start", "<i2"),
+            ("stop", "<i2"),
+        ],
+    )
+    settings["hall"] = [hall for hall, _ in items]
+    for name in names:
+        settings[name] = [data[name] or "" for _, data in items]
+    settings["is_default_setting"] = [data["is_default_setting"] for _, data in items]
+    settings["hm_keys"] = hm_keys
+    settings["stop"] = np.cumsum(counts)
+    settings["start"] = settings["stop"] - counts
+
+    operations = np.empty(
+        len(symops),
+        dtype=[
+            ("symop", width(symops)),
+            ("rotation", "i1", (3, 3)),
+            ("numerator", "i1", (3,)),
+            ("denominator", "i1", (3,)),
+        ],
+    )
+    operations["symop"] = symops
+    for row, symop in zip(operations, symops, strict=True):
+        rotation, translation = _parse_symop(symop)
+        row["rotation"] = rotation
+        row["numerator"] = [shift.numerator for shift in translation]
+        row["denominator"] = [shift.denominator for shift in translation]
+
+    np.save(Path(output_dir) / "spacegroups.npy", settings)
+    np.save(Path(output_dir) / "spacegroup_symops.npy", setting_symops)
+    np.save(Path(output_dir) / "symops.npy", operations)
 
-    data = build_sg_dict(INPUT_FN, "temp.txt")
 
-    # with open(OUTPUT_FN, "w") as f:
-    #     json.dump(data, f, indent="  ")
+if __name__ == "__main__":
+    OUTPUT_DIR = "parsnip"
+    INPUT_FN = "space-groups.txt"
 
-    with open(OUTPUT_FN) as f:
-        json.load(f)
+    data = build_sg_dict(INPUT_FN, "temp.txt")
+    write_sg_database(data, OUTPUT_DIR)
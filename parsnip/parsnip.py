@@ -67,15 +67,23 @@ r"""An interface for reading `CIF`_ files in Python.
 
 from __future__ import annotations
 
+import bz2
+import gzip
+import io
+import json
+import lzma
+import mmap
+import os
 import re
 import warnings
 from collections import defaultdict
-from collections.abc import Iterable
-from fnmatch import filter as fnfilter
-from fnmatch import fnmatch
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from contextlib import contextmanager, suppress
+from fnmatch import translate
 from importlib.util import find_spec
+from itertools import count, pairwise
 from pathlib import Path
-from typing import ClassVar, Literal, TextIO
+from typing import BinaryIO, ClassVar, Literal, TextIO
 
 import numpy as np
 from more_itertools import flatten, peekable
@@ -90,22 +98,43 @@ from parsnip._errors import (
 from parsnip.patterns import (
     _ANY,
     _CIF_KEY,
+    _EOL,
+    _INDENT,
+    _MAX_EXACT_INTEGER,
+    _NONSIMPLE_BLOCK,
+    _NONSIMPLE_DELIMITER,
     _PROG_PLUS,
     _PROG_STAR,
     _WHITESPACE,
     _accumulate_nonsimple_data,
+    _apply_scaled_symops,
+    _apply_symops,
     _box_from_lengths_and_angles,
+    _build_key_index,
+    _category_prefixes,
     _compile_float_eval,
+    _compile_wildcard,
     _contains_wildcard,
+    _decode_bytes,
     _dtype_from_int,
     _flatten_or_none,
+    _fold_key,
+    _fraction_array,
     _is_data,
     _is_key,
+    _join_lines,
+    _lookup_spacegroup,
     _lookup_symops,
+    _parse_numeric_codes,
+    _parse_numeric_value,
+    _resolve_key,
     _safe_eval,
+    _scaled_sites,
     _snap_position,
+    _spacegroup_operators,
     _strip_comments,
     _strip_quotes,
+    _symop_operators,
     _try_cast_to_numeric,
     _write_debug_output,
     cast_array_to_float,
@@ -113,6 +142,44 @@ from parsnip.patterns import (
 
 NONTABLE_LINE_PREFIXES = ("_", "#")
 
+_COMPRESSION_MAGIC = {
+    b"\x1f\x8b": gzip.open,
+    b"BZh": bz2.open,
+    b"\xfd7zXZ\x00": lzma.open,
+}
+"""Leading bytes of gzip, bzip2, and xz files, and the function to open each."""
+_DECOMPRESSED_CHUNK_SIZE = 1 << 20
+"""Number of bytes read at a time from a compressed file that is split into blocks."""
+
+_INDEX_SUFFIX = ".pidx"
+"""Suffix appended to the name of a file to locate its sidecar index."""
+_INDEX_VERSION = 1
+"""Version of the sidecar index format, incremented when the format changes."""
+
+_SIMPLE_TABLE_BYTES = bytes(
+    byte for byte in [*range(9, 14), *range(28, 128)] if chr(byte) not in "\"';"
+)
+"""ASCII bytes that may appear in a table body that is split in bulk.
+
+Quotes and semicolons require the regex tokenizer, and non-whitespace control
+characters would be misread as separators.
+"""
+_WHITESPACE_TABLE = bytes(
+    int(chr(byte).isspace()) if byte < 128 else 0 for byte in range(256)
+)
+"""Translation table mapping ASCII whitespace bytes to 1 and all others to 0."""
+_COUNT_BLOCK_SIZE = 1 << 20
+"""Number of characters of a table body read at a time to count its entries."""
+
+_FLOAT_CHAR = 2
+_NUMERIC_CHAR_KINDS = np.zeros(129, dtype=np.uint8)
+_NUMERIC_CHAR_KINDS[[0, *b"0123456789+-()"]] = 1
+_NUMERIC_CHAR_KINDS[[*b".eE"]] = _FLOAT_CHAR
+"""Kinds of the code points in numeric entries: 1 for integers, 2 for floats only.
+
+All other code points (indexed by their value, clipped to 128) map to 0.
+"""
+
 
 class CifFile:
     """Parser for CIF files.
@@ -148,10 +215,83 @@ class CifFile:
     Parameters
     ----------
         fn : str | Path
-            Path to the file to be opened.
+            Path to the file to be opened. Files compressed with gzip, bzip2, or xz
+            are detected and decompressed automatically.
         cast_values : bool, optional
             Whether to convert string numerics to integers and float.
             Default value = ``False``
+        engine : {'buffer', 'line'}, optional
+            Whether to tokenize the entire file in a single pass over one buffer
+            (``engine='buffer'``) or to use the original line-by-line parser
+            (``engine='line'``). Both engines produce the same :attr:`~.pairs` and
+            :attr:`~.loops`, but the buffer engine is several times faster.
+            Default value = ``'buffer'``
+        mmap : bool | None, optional
+            Whether to memory-map the file rather than reading it into a string. The
+            buffer engine then matches the mapped bytes directly, and only decodes the
+            data entries and tables it extracts. This reduces the peak memory required
+            to read very large files. If ``None``, files larger than
+            :attr:`~._MMAP_THRESHOLD` bytes are mapped automatically. Only paths to
+            uncompressed files can be mapped, and mapping requires ``engine='buffer'``.
+            Default value = ``None``
+        lazy : bool, optional
+            Whether to defer tokenizing each table until it is first accessed. The
+            initial scan then records only the column labels and the location of each
+            table body, which is much faster for files whose tables are not used (for
+            example, when only :attr:`~.pairs` or :attr:`~.read_cell_params` are
+            needed). Tables are built the first time they are queried with
+            :meth:`~.get_from_loops` or :meth:`~.__getitem__`, and any remaining tables
+            are built when :attr:`~.loops` is accessed. Warnings for malformed tables
+            are emitted at that time, rather than on construction. Requires
+            ``engine='buffer'``.
+            Default value = ``False``
+        keys : typing.Iterable[str] | None, optional
+            If provided, only read the data entries and tables that match these keys.
+            Keys may contain wildcards, and are matched as in :meth:`~.get_from_pairs`
+            and :meth:`~.get_from_loops`. Tables that do not contain a matching column
+            are skipped without being tokenized, and matching tables are kept in full.
+            If no key contains a wildcard, parsing stops as soon as every key has been
+            found. In this case, file paths are memory-mapped by default, so the rest of
+            the file is never read. Requires ``engine='buffer'``.
+            Default value = ``None``
+        typed_loops : bool, optional
+            Whether to store numeric table columns as numbers rather than strings.
+            Columns whose entries are all numbers (optionally with a standard
+            uncertainty in parentheses) or the missing-value markers ``.`` and ``?``
+            are stored as ``int64``, or as ``float64`` if any entry is not an integer
+            or is missing. Missing values are stored as ``nan``, and uncertainties are
+            stored in :attr:`~.uncertainties`. All other columns remain strings.
+            Note that trailing zeros are not preserved, so fractional coordinates
+            are snapped with the precision of their shortest representation in
+            :meth:`~.build_unit_cell`.
+            Default value = ``False``
+        string_storage : {'unicode', 'bytes', 'stringdtype'}, optional
+            How to store the string columns of tables. Each column is sized to fit its
+            longest entry. With ``string_storage='unicode'``, columns are stored as
+            ``<U{n}`` strings. With ``string_storage='bytes'``, columns that only
+            contain ASCII characters are stored as ``S{n}`` bytes, which use a quarter
+            of the memory, and other columns remain ``<U{n}`` strings. With
+            ``string_storage='stringdtype'``, entries are stored as variable-width
+            :class:`numpy.dtypes.StringDType` strings, so columns with a few very long
+            entries do not pay for their width in every row. NumPy does not support
+            ``StringDType`` fields in structured arrays, so each table in
+            :attr:`~.loops` is then a :math:`(N, M)` array of strings, with column
+            labels given by :attr:`~.loop_labels`. Requires NumPy 2 and
+            ``typed_loops=False``.
+            Default value = ``'unicode'``
+        categorical : bool | typing.Iterable[str], optional
+            Whether to dictionary-encode the string columns of tables. Each encoded
+            column stores the position of each entry in a sorted array of its distinct
+            values, using the narrowest unsigned integer type. This is much smaller for
+            columns such as element symbols or residue names, and comparisons act on
+            the integer codes. If ``True``, string columns with at most
+            :attr:`~._MAX_CATEGORIES` distinct values, which each appear at least twice
+            on average, are encoded. If an iterable of keys, columns matching those keys
+            (which may contain wildcards) are encoded. Encoded columns are decoded by
+            :meth:`~.get_from_loops` and :meth:`~.__getitem__`, and the codes and values
+            are returned by :meth:`~.get_categorical`. Not supported with
+            ``string_storage='stringdtype'``.
+            Default value = ``False``
     """
 
     def __init__(
@@ -159,6 +299,13 @@ class CifFile:
         file: str | Path | TextIO | Iterable[str],
         cast_values: bool = False,
         strict: bool = False,
+        engine: Literal["buffer", "line"] = "buffer",
+        mmap: bool | None = None,
+        lazy: bool = False,
+        keys: Iterable[str] | None = None,
+        typed_loops: bool = False,
+        string_storage: Literal["unicode", "bytes", "stringdtype"] = "unicode",
+        categorical: bool | Iterable[str] = False,
     ):
         """Create a CifFile object from a filename, file object, or iterator over `str`.
 
@@ -166,23 +313,93 @@ class CifFile:
         Comment lines are ignored.
 
         """
+        valid_engines = {"buffer", "line"}
+        if engine not in valid_engines:
+            raise ValueError(f"Engine '{engine}' not in {valid_engines}.")
+        valid_storage = {"unicode", "bytes", "stringdtype"}
+        if string_storage not in valid_storage:
+            msg = f"String storage '{string_storage}' not in {valid_storage}."
+            raise ValueError(msg)
+        if string_storage == "stringdtype":
+            if typed_loops:
+                msg = "typed_loops is not supported with string_storage='stringdtype'."
+                raise ValueError(msg)
+            if categorical:
+                msg = "categorical is not supported with string_storage='stringdtype'."
+                raise ValueError(msg)
+            if not self.__class__._STRINGDTYPE_AVAILABLE:
+                msg = "string_storage='stringdtype' requires NumPy 2.0 or newer."
+                raise ImportError(msg)
+
         self._fn = file
-        self._pairs = {}
-        self._loops = []
+        self._pairs = _VersionedDict()
+        self._loops = _VersionedList()
+        self._block_name = None
+        self._lazy = lazy
+        self._mapped = None
+        self._typed_loops = typed_loops
+        self._string_storage = string_storage
+        self._uncertainties = []
+        self._typed_pairs = None
         self._strict = strict
         self._symops_key = [""]
         self._raw_cell_keys = []
         self._raw_wyckoff_keys = []
         self._wildcard_mapping_data = defaultdict(list)
+        self._pair_index_data = (None, -1, {})
+        self._label_index_data = (None, -1, {})
+        self._category_index_data = (None, None, {})
+        self._cache = {}
+        self._cache_state = ()
 
         self._cpat = {k: re.compile(pattern) for (k, pattern) in self.PATTERNS.items()}
         self._cast_values = cast_values
-
-        if (isinstance(file, str) and _is_potentially_valid_path(file)) or isinstance(
-            file, Path
-        ):
+        self._is_categorical = None
+        if categorical is not True and categorical:
+            categorical = [categorical] if isinstance(categorical, str) else categorical
+            self._is_categorical = _key_matcher(categorical, self._cpat)
+        self._categorical = bool(categorical)
+
+        is_path = (
+            isinstance(file, str) and _is_potentially_valid_path(file)
+        ) or isinstance(file, Path)
+        opener = _compressed_opener(file) if is_path else None
+        if mmap is None:
+            mmap = (
+                is_path
+                and opener is None
+                and engine == "buffer"
+                and (keys is not None or os.path.getsize(file) >= self._MMAP_THRESHOLD)
+            )
+        elif mmap and not (is_path and opener is None and engine == "buffer"):
+            msg = (
+                "Memory mapping requires an uncompressed file path and engine='buffer'."
+            )
+            raise ValueError(msg)
+        if lazy and engine != "buffer":
+            msg = "Lazy parsing requires engine='buffer'."
+            raise ValueError(msg)
+        if keys is not None and engine != "buffer":
+            msg = "Reading a subset of keys requires engine='buffer'."
+            raise ValueError(msg)
+        if isinstance(keys, str):
+            keys = [keys]
+        self._keys = None if keys is None else [*keys]
+
+        if mmap:
+            self._parse_mapped(file)
+        elif opener is not None:
+            with opener(file, "rb" if engine == "buffer" else "rt") as file:
+                if engine == "buffer":
+                    self._parse_buffer(file.read())
+                else:
+                    self._parse(peekable(file))
+        elif is_path:
             with open(file) as file:
-                self._parse(peekable(file))
+                if engine == "buffer":
+                    self._parse_buffer(file.read())
+                else:
+                    self._parse(peekable(file))
         # We expect a TextIO | IOBase, but allow users to pass any Iterable[string_like]
         # This includes a str that does not point to a file!
         elif isinstance(file, str):
@@ -192,11 +409,25 @@ class CifFile:
                 "ensure it is validly formatted."
             )
             warnings.warn(msg, RuntimeWarning, stacklevel=2)
-            self._parse(peekable(file.splitlines(True)))
+            if engine == "buffer":
+                self._parse_buffer(_join_lines(file.splitlines(True)))
+            else:
+                self._parse(peekable(file.splitlines(True)))
+        elif engine == "buffer":
+            self._parse_buffer(
+                file.read() if hasattr(file, "read") else _join_lines(file)
+            )
         else:
             self._parse(peekable(file))
 
     _SYMPY_AVAILABLE = find_spec("sympy") is not None
+    _STRINGDTYPE_AVAILABLE = hasattr(getattr(np, "dtypes", None), "StringDType")
+
+    _MMAP_THRESHOLD: ClassVar[int] = 64 * 2**20
+    """File size (in bytes) above which files are memory-mapped by default."""
+
+    _MAX_CATEGORIES: ClassVar[int] = 256
+    """Largest number of distinct values of an automatically encoded column."""
 
     @property
     def pairs(self):
@@ -211,6 +442,51 @@ class CifFile:
         """
         return self._pairs
 
+    @property
+    def typed_pairs(self) -> Mapping[str, str | int | float]:
+        """A read-only view of :attr:`~.pairs`, with numeric values cast to numbers.
+
+        Unlike ``cast_values``, each value is only parsed the first time it is read,
+        and :attr:`~.pairs` is left unchanged. Quotes are stripped from all values, and
+        numbers (including signs and exponents) are cast to int or float. The standard
+        uncertainty of a value is cached alongside it, and can be read with
+        ``typed_pairs.uncertainty(key)``.
+
+        Example
+        -------
+        >>> cif.typed_pairs["_cell_length_a"]
+        3.6
+        >>> cif.typed_pairs["_journal_year"], cif.pairs["_journal_year"]
+        (1999, '1999')
+        >>> cif.typed_pairs.uncertainty("_cell_length_a")
+        nan
+
+        Returns
+        -------
+        Mapping[str, str | int | float]
+        """
+        if self._typed_pairs is None or self._typed_pairs._pairs is not self._pairs:
+            self._typed_pairs = _TypedPairs(self._pairs)
+        return self._typed_pairs
+
+    @property
+    def block_name(self) -> str | None:
+        """The name of the first data block in the file, or None if there is no block.
+
+        Multi-block files are read into a single namespace. Use :func:`~.iter_blocks`
+        to read each block of the file separately.
+
+        Example
+        -------
+        >>> cif.block_name
+        'cif_file'
+
+        Returns
+        -------
+        str | None
+        """
+        return self._block_name
+
     @property
     def loops(self):
         r"""A list of data tables (`loop_`'s) extracted from the file.
@@ -226,8 +502,41 @@ class CifFile:
         list[numpy.ndarray[str]]
             A list of structured arrays containing table data from the file.
         """
+        self._build_deferred_loops()
         return self._loops
 
+    @property
+    def uncertainties(self) -> list[dict[str, np.ndarray]]:
+        r"""The standard uncertainties of numeric table columns, for each table.
+
+        Only populated when the file is read with ``typed_loops=True``. Each table in
+        :attr:`~.loops` has a dict from column label to a ``float64`` array with the
+        same shape as the column, in the units of the values themselves (so
+        ``1.234(5)`` has an uncertainty of ``0.005``), with ``nan`` where no
+        uncertainty was given. Columns without any uncertainties are omitted, as are
+        tables added to :attr:`~.loops` after reading.
+
+        Example
+        -------
+        >>> from io import StringIO
+        >>> table = "loop_\n_x\n_label\n1.234(5) a\n.  b\n-12.5(11) c\n"
+        >>> typed = CifFile(StringIO(table), typed_loops=True)
+        >>> typed["_x"]
+        array([[  1.234],
+               [    nan],
+               [-12.5  ]])
+        >>> typed.uncertainties[0]["_x"]
+        array([[0.005],
+               [  nan],
+               [1.1  ]])
+
+        Returns
+        -------
+        list[dict[str, numpy.ndarray[float]]]
+        """
+        self._build_deferred_loops()
+        return [self._table_uncertainties(i) for i in range(len(self._loops))]
+
     def __getitem__(self, index: str | Iterable[str]):
         """Return an item or list of items from :meth:`~.pairs` and :meth:`~.loops`.
 
@@ -248,7 +557,7 @@ class CifFile:
         >>> cif["_journal_year"]
         '1999'
         >>> cif["_atom_site_label"]
-        array([['Cu1']], dtype='<U12')
+        array([['Cu1']], dtype='<U3')
 
         Indexing with a list of keys:
 
@@ -273,16 +582,18 @@ class CifFile:
         output = []
         for key in [index] if isinstance(index, str) else index:
             pairs_match = self.get_from_pairs(key)
-            loops_match = self.get_from_loops(key)
-            output.append(pairs_match if pairs_match is not None else loops_match)
+            output.append(
+                pairs_match if pairs_match is not None else self.get_from_loops(key)
+            )
         return output[0] if len(output) == 1 else output
 
     def _process_wildcard(
         self, wildcard_key: str, raw_keys: str | Iterable[str], val: str | int | float
     ) -> str | int | float:
-        """Save the raws key associated with a wildcard lookup and save the value."""
-        if _contains_wildcard(wildcard_key):
-            for key in [raw_keys] if isinstance(raw_keys, str) else raw_keys:
+        """Save the raw keys associated with a wildcard or aliased lookup."""
+        raw_keys = [raw_keys] if isinstance(raw_keys, str) else raw_keys
+        if _contains_wildcard(wildcard_key) or raw_keys != [wildcard_key]:
+            for key in raw_keys:
                 if key not in self._wildcard_mapping_data[wildcard_key]:
                     self._wildcard_mapping_data[wildcard_key].append(key)
 
@@ -293,6 +604,168 @@ class CifFile:
         """Return the mappings associated with attempted wildcard queries."""
         return self._wildcard_mapping_data
 
+    def _memoize(self, key: tuple, compute: Callable):
+        """Return the cached result of ``compute()``, computing it on the first call.
+
+        Results are cached by ``key``, and the cache is cleared whenever the pairs or
+        tables have changed since it was filled. Arrays and lists are copied on the way
+        out, so callers cannot modify cached results.
+        """
+        if self._data_state() != self._cache_state:
+            self._cache.clear()
+        if key not in self._cache:
+            result = compute()
+            state = self._data_state()
+            if state != self._cache_state:
+                # Building deferred tables changes the state, but not the data
+                self._cache.clear()
+                self._cache_state = state
+            self._cache[key] = result
+        return _copy_result(self._cache[key])
+
+    def _data_state(self) -> tuple:
+        """Identify the current pairs and tables, to detect changes to either.
+
+        Versions are unique across objects, so replacing the pairs also changes the
+        state.
+        """
+        return (self._pairs.version, self._loops.version)
+
+    def clear_cache(self):
+        """Clear the cached results of :attr:`~.symops`, :meth:`~.build_unit_cell`, etc.
+
+        Derived data such as :meth:`~.read_cell_params`, :attr:`~.box`,
+        :attr:`~.lattice_vectors`, :attr:`~.loop_labels`, :attr:`~.symops`,
+        :attr:`~.wyckoff_positions` and :meth:`~.build_unit_cell` is cached after it is
+        first computed. The cache is cleared automatically when :attr:`~.pairs` is
+        modified or a table in :attr:`~.loops` is added, removed, or replaced. Tables
+        that are modified in place are not detected, and this method must be called
+        afterward. It may also be called to release the memory held by the cache.
+
+        Example
+        -------
+        >>> cif.box
+        (3.6, 3.6, 3.6, 0.0, 0.0, 0.0)
+        >>> cif.pairs["_cell_length_a"] = "4.0"
+        >>> cif.box
+        (4.0, 3.6, 3.6, 0.0, 0.0, 0.0)
+        >>> cif.clear_cache()
+        """
+        self._cache.clear()
+
+    def _raw_keys(self, key: str) -> list[str]:
+        """Return the keys in the file that matched a previous lookup of ``key``."""
+        return self._wildcard_mapping_data.get(key, [key])
+
+    @property
+    def _pair_index(self) -> dict[str, list[str]]:
+        """Map the folded form of each key in :attr:`~.pairs` to its raw keys.
+
+        The index is rebuilt if the pairs have been replaced or modified since it was
+        last built.
+        """
+        pairs, version, index = self._pair_index_data
+        if pairs is not self._pairs or version != self._pairs.version:
+            index = _build_key_index(self._pairs)
+            self._pair_index_data = (self._pairs, self._pairs.version, index)
+        return index
+
+    @property
+    def _label_index(self) -> dict[str, dict[str, list[int]]]:
+        """Map the folded form of each table label to its raw labels and tables.
+
+        Each raw label maps to the positions in :attr:`_loops` of the tables that
+        contain it. The index is rebuilt whenever a table is added, removed, or
+        replaced, for example when deferred tables are built.
+        """
+        loops, version, index = self._label_index_data
+        if loops is not self._loops or version != self._loops.version:
+            index = defaultdict(dict)
+            for position, table in enumerate(self._loops):
+                labels = table[0] if isinstance(table, tuple) else _table_labels(table)
+                for label in labels:
+                    index[_fold_key(label)].setdefault(label, []).append(position)
+            index = dict(index)
+            self._label_index_data = (self._loops, self._loops.version, index)
+        return index
+
+    @property
+    def _category_index(self) -> dict[str, tuple[list[str], list[str]]]:
+        """Map the name of each category to the keys of its pairs and table labels.
+
+        The index is derived from :attr:`_pair_index` and :attr:`_label_index`, and is
+        rebuilt whenever either of them is.
+        """
+        pair_index, label_index = self._pair_index, self._label_index
+        pairs, labels, index = self._category_index_data
+        if pairs is not pair_index or labels is not label_index:
+            index = defaultdict(lambda: ([], []))
+            for key in self._pairs:
+                for category in _category_prefixes(key):
+                    index[category][0].append(key)
+            for raw_labels in label_index.values():
+                for label in raw_labels:
+                    for category in _category_prefixes(label):
+                        index[category][1].append(label)
+            index = dict(index)
+            self._category_index_data = (pair_index, label_index, index)
+        return index
+
+    def _locate_labels(self, keys: Iterable[str]) -> dict[int, list[str]]:
+        """Find the tables containing labels that match any of ``keys``.
+
+        Deferred tables with matching labels are built first. Returns the labels
+        matched in each table, in the order of ``keys``, keyed by the position of the
+        table in :attr:`_loops`.
+        """
+        index = self._label_index
+        wanted = [
+            *dict.fromkeys(label for key in keys for label in _resolve_key(index, key))
+        ]
+        if not wanted:
+            return {}
+        if self._lazy and any(
+            isinstance(self._loops[position], tuple)
+            for label in wanted
+            for position in index[_fold_key(label)][label]
+        ):
+            wanted_set = set(wanted)
+            self._build_deferred_loops(lambda labels: not wanted_set.isdisjoint(labels))
+            index = self._label_index
+
+        located = defaultdict(list)
+        for label in wanted:
+            for position in index.get(_fold_key(label), {}).get(label, ()):
+                located[position].append(label)
+        return dict(sorted(located.items())) if len(located) > 1 else located
+
+    def _match_pairs(self, index: str) -> list:
+        """Return the values of the pairs matching a key or wildcard pattern."""
+        if not _contains_wildcard(index):
+            keys = _resolve_key(self._pair_index, index)
+            return [self._process_wildcard(index, keys, self._pairs[k]) for k in keys]
+
+        match = _compile_wildcard(index, True, self._cpat["bracket"].pattern)
+        return [
+            self._process_wildcard(index, k, v)
+            for (k, v) in self.pairs.items()
+            if match(k)
+        ]
+
+    def _label_matcher(self, index: str) -> Callable | None:
+        """Return a filter selecting the labels of a table that match ``index``.
+
+        Labels are selected in table order. Returns None if no table has a label
+        matching ``index``.
+        """
+        if _contains_wildcard(index):
+            match = _compile_wildcard(index, False, self._cpat["bracket"].pattern)
+            return lambda labels: [label for label in labels if match(label)]
+        wanted = set(_resolve_key(self._label_index, index))
+        if not wanted:
+            return None
+        return lambda labels: [label for label in labels if label in wanted]
+
     def get_from_pairs(self, index: str | Iterable[str]):
         """Return an item or items from the dictionary of key-value pairs.
 
@@ -305,6 +778,10 @@ class CifFile:
             ordering of the matching keys in the file. Lookups using this method are
             case-insensitive, per the CIF specification.
 
+        Keys without wildcards are looked up in a hash index, and also match keys
+        written in the other dialect: ``_cell_length_a`` matches ``_cell.length_a``
+        in an mmCIF file. Keys that match exactly are preferred.
+
         Indexing with a string returns the value from the :meth:`~.pairs` dict. Indexing
         with an Iterable of strings returns a list of values, with ``None`` as a
         placeholder for keys that did not match any data.
@@ -326,9 +803,9 @@ class CifFile:
         >>> cif.get_from_pairs("_journal*")
         ['1999', '0', '123']
 
-        Single-character wildcards can generalize keys across CIF and mmCIF files:
+        Keys are generalized across CIF and mmCIF files:
 
-        >>> cif.get_from_pairs("_symmetry?space_group_name_H-M")
+        >>> cif.get_from_pairs("_symmetry.space_group_name_H-M")
         "'Fm-3m'"
 
         Parameters
@@ -343,39 +820,19 @@ class CifFile:
                 resulting list would have length 1, the item is returned directly
                 instead.
         """
-        if isinstance(index, str):  # Escape brackets with []
-            index = self._cpat["bracket"].sub(r"[\1]", index)
-            return _flatten_or_none(
-                [
-                    self._process_wildcard(index, k, v)
-                    for (k, v) in self.pairs.items()
-                    if fnmatch(k.lower(), index.lower())
-                ]
-            )
-
-        # Escape all brackets in all indices
-        index = [self._cpat["bracket"].sub(r"[\1]", i) for i in index]
-        matches = [
-            [
-                _flatten_or_none(
-                    [
-                        self._process_wildcard(pat, k, v)
-                        for (k, v) in self.pairs.items()
-                        if fnmatch(k.lower(), pat.lower())
-                    ]
-                )
-            ]
-            for pat in index
-        ]
-        return [_flatten_or_none(m) for m in matches]
+        if isinstance(index, str):
+            return _flatten_or_none(self._match_pairs(index))
+        return [_flatten_or_none(self._match_pairs(i)) for i in index]
 
-    def get_from_loops(self, index: str | Iterable[str]):
+    def get_from_loops(self, index: str | Iterable[str], *, copy: bool = True):
         """Return a column or columns from the matching table in :attr:`~.loops`.
 
         If index is a single string, a single column will be returned from the matching
         table. If index is an Iterable of strings, the corresponding table slices will
         be returned. Slices from the same table will be grouped in the output array, but
-        slices from different arrays will be returned separately.
+        slices from different arrays will be returned separately. As in
+        :meth:`~.get_from_pairs`, labels without wildcards are looked up in a hash index
+        and match case-insensitively, across the CIF and mmCIF dialects.
 
         .. tip::
 
@@ -418,7 +875,7 @@ class CifFile:
                ['96', 'z,y+1/2,x+1/2'],
                ['118', 'z+1/2,-y,x+1/2'],
                ['192', 'z+1/2,y+1/2,x']], dtype='<U14'),
-            array([['Cu', 'a']], dtype='<U12')]
+            array([['Cu', 'a']], dtype='<U2')]
 
 
         .. caution::
@@ -432,16 +889,29 @@ class CifFile:
         Case where ordering of output matches the input file, not the provided keys:
 
         >>> cif.get_from_loops([*table_1_cols, *table_2_cols])
-        [array([['Cu', 'a']], dtype='<U12'),
+        [array([['Cu', 'a']], dtype='<U2'),
          array([['1', 'x,y,z'],
                 ['96', 'z,y+1/2,x+1/2'],
                 ['118', 'z+1/2,-y,x+1/2'],
                 ['192', 'z+1/2,y+1/2,x']], dtype='<U14')]
 
+        Repeated reads of large columns can avoid copying the table with
+        ``copy=False``, which returns read-only views of the stored data:
+
+        >>> column = cif.get_from_loops("_symmetry_equiv_pos_as_xyz", copy=False)
+        >>> column.flags.writeable
+        False
+
         Parameters
         ----------
             index: str | typing.Iterable[str]
                 A column name or list of column names.
+            copy: bool, optional
+                If False, return read-only views into the stored tables rather than
+                copies. Columns are only viewed when the selected columns of a table
+                share a dtype and are evenly spaced in memory, and are copied otherwise.
+                Dictionary-encoded columns are always decoded to a copy.
+                Default value = ``True``
 
         Returns
         -------
@@ -452,35 +922,272 @@ class CifFile:
         """
         result = []
         if isinstance(index, str):
-            index = self._cpat["bracket"].sub(r"[\1]", index)
-            for table, labels in zip(self.loops, self.loop_labels, strict=False):
-                matching_keys = fnfilter(labels, index)
-                match = table[matching_keys]
+            if _contains_wildcard(index):
+                matching = self._label_matcher(index)
+                self._build_deferred_loops(matching)
+                located = [
+                    (table, matching(_table_labels(table)))
+                    for table in self._built_loops
+                ]
+            else:
+                located = [
+                    (self._loops[position], labels)
+                    for position, labels in self._locate_labels([index]).items()
+                ]
 
-                if match.size > 0:
+            for table, matching_keys in located:
+                if matching_keys and table.size > 0:
                     result.append(
                         self._process_wildcard(
                             index,
                             matching_keys,
-                            self.structured_to_unstructured(match).squeeze(axis=1),
+                            _select_columns(table, matching_keys, copy),
                         )
                     )
             if result == [] or (len(result) == 1 and len(result[0]) == 0):
                 return None
             return result[0] if len(result) == 1 else result
 
-        if isinstance(index, (set, frozenset)):
-            index = list(index)
+        for position, labels in self._locate_labels(index).items():
+            result.append(_select_columns(self._loops[position], labels, copy))
+        return _flatten_or_none(result)
+
+    def iter_loop_chunks(
+        self, index: str, chunk_rows: int = 65536, *, return_uncertainties: bool = False
+    ) -> Iterator[np.ndarray] | Iterator[tuple[np.ndarray, dict[str, np.ndarray]]]:
+        """Iterate over the rows of a table in chunks of at most ``chunk_rows`` rows.
+
+        The table is the first in :attr:`~.loops` with a label matching ``index``, and
+        each chunk is a structured array with the same labels and layout. When the file
+        was opened with ``lazy=True`` and the table has not yet been built, chunks are
+        tokenized directly from the file and the full table is never held in memory.
+        As a result, the string width of each chunk only fits the data in that chunk.
+
+        Such tables are read twice. The first pass checks the table as :attr:`~.loops`
+        does, so a table that is empty or ends with a partial row is skipped with a
+        warning before any chunk is yielded. With ``typed_loops`` or ``categorical``,
+        it also finds the type of each column and the categories of each encoded column
+        for the whole table. The second pass converts each chunk in the same way, so
+        chunks agree with the table read by :attr:`~.loops`.
+
+        Example
+        -------
+        >>> chunks = [*cif.iter_loop_chunks("_symmetry_equiv_pos_as_xyz", chunk_rows=3)]
+        >>> [chunk.shape for chunk in chunks]
+        [(3, 1), (1, 1)]
+        >>> chunks[1]
+        array([[('192', 'z+1/2,y+1/2,x')]],
+              dtype=...)
+
+        Parameters
+        ----------
+            index: str
+                A column label or wildcard pattern identifying the table.
+            chunk_rows: int, optional
+                The maximum number of rows in each chunk.
+                Default value = ``65536``
+            return_uncertainties: bool, optional
+                Whether to yield the standard uncertainties of each chunk alongside it,
+                as a dict in the format of each table in :attr:`~.uncertainties`.
+                Default value = ``False``
 
-        index = np.atleast_1d(index)
-        for table in self.loops:
-            matches = index[np.any(index[:, None] == table.dtype.names, axis=1)]
-            if len(matches) == 0:
+        Yields
+        ------
+            :class:`numpy.ndarray` | tuple[:class:`numpy.ndarray`, dict]:
+                Successive :math:`(N, 1)` structured arrays of table rows, and their
+                uncertainties if ``return_uncertainties`` is True.
+        """
+        if chunk_rows < 1:
+            raise ValueError(f"chunk_rows must be positive (got {chunk_rows}).")
+
+        matching = self._label_matcher(index)
+        if matching is None:
+            return
+        for position, table in enumerate(self._loops):
+            if not isinstance(table, tuple):
+                if matching(_table_labels(table)):
+                    uncertainties = self._table_uncertainties(position)
+                    for start in range(0, len(table), chunk_rows):
+                        chunk = table[start : start + chunk_rows]
+                        if not return_uncertainties:
+                            yield chunk
+                            continue
+                        rows = slice(start, start + len(chunk))
+                        yield (
+                            chunk,
+                            {
+                                label: sigma[rows]
+                                for label, sigma in uncertainties.items()
+                            },
+                        )
+                    return
+                continue
+
+            loop_keys, span = table
+            if not matching(loop_keys):
+                continue
+
+            # Tables are checked as in _add_loop before any chunk is yielded
+            n_entries, (kinds, categories, with_sigma) = self._scan_deferred_table(
+                loop_keys, span, chunk_rows
+            )
+            if not self._check_loop(loop_keys, n_entries, position):
                 continue
+            entries = _iter_table_entries(*span, self._cpat)
+            for chunk in self._iter_string_chunks(loop_keys, entries, chunk_rows):
+                chunk, uncertainties = self._chunk_table(
+                    chunk, kinds, categories, with_sigma
+                )
+                yield (chunk, uncertainties) if return_uncertainties else chunk
+            return
+
+    def _scan_deferred_table(
+        self, loop_keys: list[str], span: tuple, chunk_rows: int
+    ) -> tuple[int, tuple]:
+        """Read a deferred table once, before its chunks are converted.
+
+        Returns the number of entries in the table, and the column kinds, categories
+        and labels with uncertainties found by :meth:`_plan_chunks` (if needed).
+        """
+        if not (self._typed_loops or self._categorical):
+            return _count_table_entries(*span, self._cpat), (None, None, set())
+        n_entries = 0
+
+        def counted_entries():
+            nonlocal n_entries
+            for entries in _iter_table_entries(*span, self._cpat):
+                n_entries += len(entries)
+                yield entries
+
+        chunks = self._iter_string_chunks(loop_keys, counted_entries(), chunk_rows)
+        plan = self._plan_chunks(chunks)
+        return n_entries, plan
+
+    def _iter_string_chunks(
+        self, loop_keys: list[str], entries: Iterable[list[str]], chunk_rows: int
+    ) -> Iterator[np.ndarray]:
+        """Yield structured tables of strings for each chunk of rows of a table body.
+
+        ``entries`` yields the data entries of each logical line of the body. A partial
+        row at the end of the body is ignored.
+        """
+        n_cols = len(loop_keys)
+        chunk, chunk_size = [], chunk_rows * n_cols
+        for line in entries:
+            chunk.extend(line)
+            if len(chunk) >= chunk_size:
+                yield _structured_table(loop_keys, chunk[:chunk_size])
+                del chunk[:chunk_size]
+
+        n_extra = len(chunk) % n_cols
+        if len(chunk) > n_extra:
+            yield _structured_table(loop_keys, chunk[: len(chunk) - n_extra])
+
+    def get_categorical(self, index: str) -> tuple[np.ndarray, np.ndarray] | None:
+        """Return the codes and distinct values of a dictionary-encoded table column.
+
+        The column is the first in :attr:`~.loops` with a label matching ``index``
+        that was encoded with the ``categorical`` option of :class:`~.CifFile`. Entries
+        of the column are ``values[codes]``, and ``values`` is sorted, so filters and
+        group-bys can operate on the integer codes directly.
+
+        Example
+        -------
+        >>> encoded = CifFile("hP3.cif", categorical=["_space_group_symop_id"])
+        >>> codes, values = encoded.get_categorical("_space_group_symop_id")
+        >>> values
+        array(['1', '2', '3', '4', '5', '6'], dtype='<U1')
+        >>> (codes == np.searchsorted(values, "3")).sum()
+        np.int64(1)
+
+        Parameters
+        ----------
+            index: str
+                A column label or wildcard pattern.
+
+        Returns
+        -------
+            tuple[:class:`numpy.ndarray`, :class:`numpy.ndarray`] | None:
+                The :math:`(N, 1)` integer codes and the distinct values of the column,
+                or None if no encoded column matches.
+        """
+        matching = self._label_matcher(index)
+        if matching is None:
+            return None
+        self._build_deferred_loops(matching)
+        for table in self._built_loops:
+            for label in matching(_table_labels(table)):
+                values = _categories(table.dtype[label])
+                if values is not None:
+                    codes = table[label]
+                    return codes.astype(codes.dtype.str), values
+        return None
+
+    def category(self, name: str):
+        """Return every item of a data category, from both :attr:`~.pairs` and tables.
+
+        Items stored as key-value pairs are returned as a single record: a structured
+        array of shape :math:`(1, 1)` with a field for each key. Items stored in a
+        table are returned as a structured array with the table's shape and a field for
+        each matching label, which is a view of the stored table. When the file was
+        read with ``typed_loops=True``, the values of the record are read from
+        :attr:`~.typed_pairs`, so both records and tables hold numbers.
+
+        mmCIF data names mark the end of their category with a ``.``
+        (``_atom_site.fract_x``), and only match that category. CIF data names do not,
+        so every name that starts with the category followed by an ``_`` is included:
+        ``_atom_site`` includes ``_atom_site_fract_x`` and ``_atom_site_aniso_U_11``.
+        Categories are matched case-insensitively, and are looked up in an index of the
+        keys in the file.
 
+        Example
+        -------
+        >>> record = cif.category("_cell")
+        >>> record.dtype.names
+        ('_cell_length_a', '_cell_length_b', '_cell_length_c', '_cell_angle_alpha',
+         '_cell_angle_beta', '_cell_angle_gamma')
+        >>> record["_cell_angle_alpha"]
+        array([['90.0']], dtype='<U4')
+        >>> cif.category("symmetry_equiv_pos")["_symmetry_equiv_pos_site_id"]
+        array([['1'],
+               ['96'],
+               ['118'],
+               ['192']], dtype='<U3')
+
+        Parameters
+        ----------
+            name: str
+                The name of the category, with or without the leading underscore.
+
+        Returns
+        -------
+            list[:class:`numpy.ndarray`] | :class:`numpy.ndarray` | None:
+                The record of pairs in the category followed by the tables that
+                contain it, in the order they were read from the file. If the
+                resulting list would have length 1, the array is returned directly
+                instead. Returns None if no item belongs to the category.
+        """
+        name = "_" + name.lower().strip("_.")
+        pair_keys, labels = self._category_index.get(name, ([], []))
+        result = []
+        if pair_keys:
+            pairs = self.typed_pairs if self._typed_loops else self._pairs
             result.append(
-                self.structured_to_unstructured(table[matches]).squeeze(axis=1)
+                _table_from_columns(
+                    {key: np.asarray(pairs[key]) for key in pair_keys}, (1, 1)
+                )
             )
+        for position, located in self._locate_labels(labels).items():
+            table = self._loops[position]
+            located = set(located)
+            selected = [label for label in _table_labels(table) if label in located]
+            if table.dtype.names is not None:
+                result.append(
+                    table[selected] if located != {*table.dtype.names} else table
+                )
+            else:
+                columns = [table.labels.index(label) for label in selected]
+                result.append(_LabeledTable(np.asarray(table)[:, columns], selected))
         return _flatten_or_none(result)
 
     def read_cell_params(self, degrees: bool = True, normalize: bool = False):
@@ -509,8 +1216,15 @@ class CifFile:
         ValueError
             If the stored data cannot form a valid box.
         """
-        angle_keys = ("_cell?angle_alpha", "_cell?angle_beta", "_cell?angle_gamma")
-        box_keys = ("_cell?length_a", "_cell?length_b", "_cell?length_c", *angle_keys)
+        return self._memoize(
+            ("read_cell_params", degrees, normalize),
+            lambda: self._read_cell_params(degrees, normalize),
+        )
+
+    def _read_cell_params(self, degrees: bool, normalize: bool):
+        """Read the unit cell parameters, without caching the result."""
+        angle_keys = ("_cell_angle_alpha", "_cell_angle_beta", "_cell_angle_gamma")
+        box_keys = ("_cell_length_a", "_cell_length_b", "_cell_length_c", *angle_keys)
 
         raw_data = self[box_keys]
         if any(value is None for value in raw_data):
@@ -523,7 +1237,7 @@ class CifFile:
         else:
             cell_data = cast_array_to_float(arr=raw_data, dtype=np.float64)
 
-        self._raw_cell_keys = [self._wildcard_mapping[key] for key in box_keys]
+        self._raw_cell_keys = [self._raw_keys(key) for key in box_keys]
 
         def angle_is_invalid(x: float):
             return x <= 0.0 or x >= 180.0
@@ -597,7 +1311,7 @@ class CifFile:
         array([['Cu'],
                ['Cu'],
                ['Cu'],
-               ['Cu']], dtype='<U12')
+               ['Cu']], dtype='<U2')
         >>> data[1] # Lattice positions
         array([[0. , 0. , 0. ],
                [0. , 0.5, 0.5],
@@ -663,9 +1377,26 @@ class CifFile:
         if parse_mode not in valid_modes:
             raise ValueError(f"Parse mode '{parse_mode}' not in {valid_modes}.")
 
-        symops = self.symops
-        symops = symops if symops is not None else "x, y, z"
+        if isinstance(additional_columns, Iterable) and not isinstance(
+            additional_columns, str
+        ):
+            additional_columns = (*additional_columns,)
+        args = (n_decimal_places, additional_columns, parse_mode, snap_fractions)
+        if verbose:
+            return self._build_unit_cell(*args, verbose=True)
+        return self._memoize(
+            ("build_unit_cell", *args), lambda: self._build_unit_cell(*args)
+        )
 
+    def _build_unit_cell(
+        self,
+        n_decimal_places: int,
+        additional_columns: str | tuple[str, ...] | None,
+        parse_mode: Literal["rational", "python_float", "sympy"],
+        snap_fractions: bool,
+        verbose: bool = False,
+    ):
+        """Reconstruct the unit cell, without caching the result."""
         if additional_columns is not None:
             # Find the table of Wyckoff positions and compare to keys in additional_data
             invalid_keys = next(
@@ -683,10 +1414,6 @@ class CifFile:
                 )
                 raise ValueError(msg)
 
-        symops_str = np.array2string(
-            np.array(symops), separator=",", threshold=np.inf, floatmode="unique"
-        )
-
         frac_strs = self._read_wyckoff_positions()
         if len(frac_strs) == 0:
             msg = (
@@ -695,26 +1422,64 @@ class CifFile:
             )
             raise ParseError(msg)
 
-        coords = (
-            np.array([_snap_position(row) for row in frac_strs])
-            if snap_fractions
-            else frac_strs
-        )
-        if verbose:
-            mask = coords != frac_strs
-            for original, new in zip(frac_strs[mask], coords[mask], strict=False):
-                print(f"  Snapped {original} -> {new}")
-        if parse_mode == "python_float":
-            _fn = _compile_float_eval(symops_str)
-            wyckoff_floats = cast_array_to_float(
-                coords, dtype=float, handle_fractions=snap_fractions
+        def snapped_coords():
+            coords = (
+                np.array([_snap_position(row) for row in frac_strs])
+                if snap_fractions
+                else frac_strs
             )
-            all_frac_positions = [_fn(*xyz) for xyz in wyckoff_floats]
-        else:
-            all_frac_positions = [
-                _safe_eval(symops_str, *xyz, parse_mode=parse_mode) for xyz in coords
-            ]
-        pos = np.vstack(all_frac_positions)
+            if verbose:
+                mask = coords != frac_strs
+                for original, new in zip(frac_strs[mask], coords[mask], strict=False):
+                    print(f"  Snapped {original} -> {new}")
+            return coords
+
+        pos = coords = operators = None
+        if parse_mode != "sympy":
+            # Operations that are not affine transforms are evaluated as strings
+            with suppress(ValueError):
+                operators = self._symop_operators()
+
+        if operators is not None:
+            # Apply each operation as a rotation and translation, to all sites at once
+            rotations, translations = operators
+            scaled = (
+                _scaled_sites(frac_strs, snap_fractions)
+                if parse_mode == "rational" and not verbose
+                else None
+            )
+            if scaled is not None:
+                pos = _apply_scaled_symops(rotations, translations, *scaled)
+            else:
+                coords = snapped_coords()
+                sites = (
+                    cast_array_to_float(
+                        coords, dtype=float, handle_fractions=snap_fractions
+                    )
+                    if parse_mode == "python_float"
+                    else _fraction_array(coords)
+                )
+                pos = _apply_symops(rotations, translations, sites, parse_mode)
+
+        if pos is None:
+            coords = snapped_coords() if coords is None else coords
+            symops = self.symops
+            symops = symops if symops is not None else "x, y, z"
+            symops_str = np.array2string(
+                np.array(symops), separator=",", threshold=np.inf, floatmode="unique"
+            )
+            if parse_mode == "python_float":
+                _fn = _compile_float_eval(symops_str)
+                wyckoff_floats = cast_array_to_float(
+                    coords, dtype=float, handle_fractions=snap_fractions
+                )
+                all_frac_positions = [_fn(*xyz) for xyz in wyckoff_floats]
+            else:
+                all_frac_positions = [
+                    _safe_eval(symops_str, *xyz, parse_mode=parse_mode)
+                    for xyz in coords
+                ]
+            pos = np.vstack(all_frac_positions)
 
         # Wrap into box - works generally because these are fractional coordinates
         unrounded_pos = pos.copy() % 1
@@ -741,7 +1506,7 @@ class CifFile:
             return unrounded_pos[unique_indices]
 
         tiled_data = np.repeat(
-            self.get_from_loops(additional_columns), len(symops), axis=0
+            self.get_from_loops(additional_columns), len(pos) // len(frac_strs), axis=0
         )
 
         return tiled_data[unique_indices], unrounded_pos[unique_indices]
@@ -779,7 +1544,10 @@ class CifFile:
             The box vector lengths (in angstroms) and unitless tilt factors.
             :math:`(L_1, L_2, L_3, xy, xz, yz)`.
         """
-        return _box_from_lengths_and_angles(*self.read_cell_params(degrees=False))
+        return self._memoize(
+            ("box",),
+            lambda: _box_from_lengths_and_angles(*self.read_cell_params(degrees=False)),
+        )
 
     @property
     def lattice_vectors(self) -> np.ndarray[(3, 3), np.float64]:
@@ -813,6 +1581,10 @@ class CifFile:
         :math:`(3, 3)` :class:`numpy.ndarray`:
             The lattice vectors of the unit cell :math:`\vec{a_1}, \vec{a_2},\vec{a_3}`.
         """
+        return self._memoize(("lattice_vectors",), self._lattice_vectors)
+
+    def _lattice_vectors(self) -> np.ndarray[(3, 3), np.float64]:
+        """Compute the lattice vectors, without caching the result."""
         lx, ly, lz, xy, xz, yz = self.box
         return np.asarray(
             [[lx, xy * ly, xz * lz], [0, ly, lz * yz], [0, 0, lz]], dtype=np.float64
@@ -829,7 +1601,9 @@ class CifFile:
         list[tuple[str, ...]]:
             Column labels for :attr:`~.loops`, stored as a nested list of strings.
         """
-        return [arr.dtype.names for arr in self.loops]
+        return self._memoize(
+            ("loop_labels",), lambda: [_table_labels(arr) for arr in self.loops]
+        )
 
     @property
     def symops(self) -> np.ndarray | None:
@@ -850,14 +1624,32 @@ class CifFile:
 
         .. _`parsable algebraic form`: https://www.iucr.org/__data/iucr/cifdic_html/1/cif_core.dic/Ispace_group_symop_operation_xyz.html
         """
+        return self._memoize(("symops",), self._read_symops)
+
+    def _read_symops(self) -> np.ndarray | None:
+        """Read or look up the symmetry operations, without caching the result."""
         # Only one key is valid in each standard, so we only ever get one match.
         for key in self.__class__._SYMOP_KEYS:
             symops: np.ndarray | None = self.get_from_loops(key)
             if symops is not None:
-                self._symops_key = self._wildcard_mapping[key]
-                return symops
+                self._symops_key = self._raw_keys(key)
+                return _fixed_width_strings(symops)
         return _lookup_symops(self)
 
+    def _symop_operators(self) -> tuple[np.ndarray, np.ndarray]:
+        """Get the affine operators of the symmetry operations.
+
+        Operations looked up from the space group database are read directly as
+        operators, without decoding their strings. Operations stored in the file are
+        parsed from their strings, and the identity is used if there are none.
+        """
+        if all(self.get_from_loops(key) is None for key in self._SYMOP_KEYS):
+            setting = _lookup_spacegroup(self)
+            if setting is not None:
+                return _spacegroup_operators(setting)
+        symops = self.symops
+        return _symop_operators(symops if symops is not None else "x, y, z")
+
     @property
     def _cell_keys(self):
         """Get or compute the non-wildcard keys associated with the cell data."""
@@ -882,7 +1674,7 @@ class CifFile:
             self.get_from_loops(key) for key in self.__class__._WYCKOFF_KEYS
         ]
         wyckoff_position_data = [
-            (col[(col != ".") & (col != "?")][:, None] if col is not None else col)
+            _present_entries(col) if col is not None else col
             for col in wyckoff_position_data
         ]
 
@@ -894,7 +1686,7 @@ class CifFile:
             raise ParseError(msg)
 
         self._raw_wyckoff_keys = [
-            self._wildcard_mapping[k]
+            self._raw_keys(k)
             for (k, v) in zip(
                 self.__class__._WYCKOFF_KEYS, wyckoff_position_data, strict=False
             )
@@ -913,7 +1705,10 @@ class CifFile:
 
         .. _`fractional coordinates`: https://www.iucr.org/__data/iucr/cifdic_html/1/cif_core.dic/Iatom_site_fract_.html
         """
-        return cast_array_to_float(self._read_wyckoff_positions(), dtype=float)
+        return self._memoize(
+            ("wyckoff_positions",),
+            lambda: cast_array_to_float(self._read_wyckoff_positions(), dtype=float),
+        )
 
     @property
     def cast_values(self):
@@ -922,17 +1717,18 @@ class CifFile:
         .. caution::
 
             When set to `True` after construction, the values are modified in-place.
-            This action cannot be reversed.
+            This action cannot be reversed. :attr:`~.typed_pairs` casts values as they
+            are read instead, and leaves :attr:`~.pairs` unchanged.
         """
         return self._cast_values
 
     @cast_values.setter
     def cast_values(self, cast: bool):
         if cast:
-            self._pairs = {
-                k: _try_cast_to_numeric(_strip_quotes(v))
+            self._pairs = _VersionedDict(
+                (k, _try_cast_to_numeric(_strip_quotes(v)))
                 for (k, v) in self.pairs.items()
-            }
+            )
         else:
             warnings.warn(
                 "Setting cast_values True->False has no effect on stored data.",
@@ -942,7 +1738,80 @@ class CifFile:
         self._cast_values = cast
 
     @classmethod
-    def structured_to_unstructured(cls, arr: np.ndarray):
+    def open_indexed(
+        cls,
+        path: str | Path,
+        block: int | str = 0,
+        keys: Iterable[str] | None = None,
+        **kwargs,
+    ) -> CifFile:
+        """Read a single data block from a file, using the sidecar index of the file.
+
+        Rather than parsing the entire file, only the byte ranges of the requested block
+        are read. If ``keys`` are provided, only the key-value pairs and tables that
+        match the keys are read. The index is built with :func:`~.build_index` if it
+        does not yet exist, and is rebuilt if the file has been modified.
+
+        Example
+        -------
+        >>> CifFile.open_indexed("example_file.cif", keys=["_journal_year"]).pairs
+        {'_journal_year': '1999'}
+
+        .. testcleanup::
+
+            >>> import os
+            >>> os.remove("example_file.cif.pidx")
+
+        Parameters
+        ----------
+            path : str | Path
+                The path to the file to be read.
+            block : int | str, optional
+                The position or name of the data block to read.
+                Default value = ``0``
+            keys : typing.Iterable[str] | None, optional
+                The keys to read from the block, which may contain wildcards. If
+                ``None``, the entire block is read.
+                Default value = ``None``
+            **kwargs
+                Additional arguments to :class:`~.CifFile`, such as ``cast_values``.
+
+        Returns
+        -------
+            :class:`~.CifFile`:
+                The contents of the data block.
+        """
+        path = Path(path)
+        entry = _read_index_entry(path, block)
+
+        if keys is None:
+            spans = [entry["span"]]
+        else:
+            keys = [keys] if isinstance(keys, str) else [*keys]
+            cpat = {"bracket": re.compile(cls.PATTERNS["bracket"])}
+            is_requested = _key_matcher(keys, cpat)
+            spans = sorted(
+                [span for key, span in entry["pairs"].items() if is_requested(key)]
+                + [
+                    table["span"]
+                    for table in entry["loops"]
+                    if any(map(is_requested, table["labels"]))
+                ]
+            )
+
+        chunks = []
+        with (_compressed_opener(path) or open)(path, "rb") as f:
+            for start, stop in spans:
+                f.seek(start)
+                chunks.append(_decode_bytes(f.read(stop - start)))
+
+        cif = cls(io.StringIO(_join_lines(chunks)), keys=keys, **kwargs)
+        cif._fn = path
+        cif._block_name = entry["name"]
+        return cif
+
+    @classmethod
+    def structured_to_unstructured(cls, arr: np.ndarray, copy: bool = True):
         """Convert a structured (column-labeled) array to a standard unstructured array.
 
         This is useful when extracting entire loops from :attr:`~.loops` for use in
@@ -958,13 +1827,23 @@ class CifFile:
         ----------
             arr : :class:`numpy.ndarray`: | :class:`numpy.recarray`
                 The structured array to convert.
+            copy : bool, optional
+                If False, a read-only view of the input is returned when its fields
+                share a dtype and are evenly spaced in memory. A copy is returned
+                otherwise.
+                Default value = ``True``
 
         Returns
         -------
             :class:`numpy.ndarray`:
-                An *unstructured* array containing a copy of the data from the input.
+                An *unstructured* array containing a copy of the data from the input,
+                or a read-only view of it.
         """
-        return structured_to_unstructured(arr, copy=True, casting="safe")
+        if copy:
+            return structured_to_unstructured(arr, copy=True, casting="safe")
+        return _read_only(
+            structured_to_unstructured(arr, copy=False, casting="safe"), arr
+        )
 
     def _parse(self, data_iter: peekable):
         """Parse the cif file into python objects."""
@@ -976,11 +1855,11 @@ class CifFile:
             if line == "":
                 continue
 
-            # While we could separate multi-block files in the future, its actually
-            # beneficial for us to flatten the file into one block.
-            # block = re.match(self._cpat["block_delimiter"], line.lower().lstrip())
-            # if block is not None:
-            #     continue
+            # Multi-block files are flattened into one block, although the name of the
+            # first block is saved. Use `iter_blocks` to read blocks separately.
+            block = self._cpat["block_delimiter"].match(line.lstrip())
+            if block is not None and self._block_name is None:
+                self._block_name = block[2].strip()
 
             # Extract key-value pairs and save to the internal state ===================
             pair = self._cpat["key_value_general"].match(
@@ -993,22 +1872,8 @@ class CifFile:
                     self._strip_comments(line + next(data_iter))
                 )
 
-            if pair is not None:
-                key, val = pair.groups()
-                if self._pairs.get(key, None) is not None:
-                    msg = (
-                        f"Duplicate key `{key}` found:"
-                        f"\n (old -> new) : (`{self._pairs[key]}` -> `{val}`)"
-                    )
-                    _warn_or_err(msg, self._strict)
-                    continue
-                self._pairs.update(
-                    {
-                        key: _try_cast_to_numeric(_strip_quotes(val))
-                        if self.cast_values
-                        else val.rstrip()  # Skip trailing newlines
-                    }
-                )
+            if pair is not None and not self._add_pair(*pair.groups()):
+                continue
             if data_iter.peek(None) is None:
                 break  # Exit without StopIteration
 
@@ -1117,17 +1982,300 @@ class CifFile:
                     )
                     raise ValueError(msg) from e
                 rectable = rectable.reshape(rectable.shape, order="F")
-                self.loops.append(rectable)
+                self._append_table(rectable)
 
             if data_iter.peek(None) is None:
                 break
 
+    def _parse_buffer(self, buf: str | memoryview):
+        """Parse the cif file into python objects, from a single in-memory buffer.
+
+        The buffer is consumed in one forward pass of the ``buffer_unit`` pattern, where
+        each match is a run of empty lines, a key-value pair, an entire table, or any
+        other logical line. Tables are matched in full, so the loop body is tokenized
+        without peeking at each line.
+
+        Binary buffers (including memory-mapped files) are matched directly, and only
+        the bytes of each matched unit are decoded to text.
+        """
+        source = getattr(buf, "obj", buf)  # Deferred tables must outlive memoryviews
+
+        if self._keys is not None:
+            is_requested = _key_matcher(self._keys, self._cpat)
+            # Stop once every key is found, unless wildcards could match more data
+            missing = (
+                None
+                if any(_contains_wildcard(key) for key in self._keys)
+                else {_fold_key(key) for key in self._keys}
+            )
+
+        for kind, _, *event in _scan_buffer(buf, self._cpat):
+            if kind == "block" and self._block_name is None:
+                self._block_name = event[0]
+            elif kind == "pair":
+                if self._keys is not None:
+                    if not is_requested(event[0]):
+                        continue
+                    if missing is not None:
+                        missing.discard(_fold_key(event[0]))
+                self._add_pair(*event)
+            elif kind == "loop":
+                loop_keys, start, stop = event
+                if self._keys is not None:
+                    if not any(map(is_requested, loop_keys)):
+                        continue
+                    if missing is not None:
+                        missing.difference_update(map(_fold_key, loop_keys))
+                if self._lazy and loop_keys:
+                    deferred = (loop_keys, (source, start, stop))
+                    self._uncertainties.append((deferred, {}))
+                    self._loops.append(deferred)
+                else:
+                    body = _read_span(buf, start, stop)
+                    self._add_loop(loop_keys, self._tokenize_loop_body(body))
+
+            if self._keys is not None and missing == set():
+                break
+
+    def _tokenize_loop_body(self, body: str) -> list[str] | np.ndarray:
+        """Split the body of a table into a flat list of data entries."""
+        simple = _split_simple_table(body)
+        if simple is not None:
+            return simple
+
+        loop_data = []
+        for line in self._cpat["logical_line"].finditer(body):
+            loop_data.extend(
+                _split_table_line(line["first"], line["block"], self._cpat)
+            )
+        return loop_data
+
+    @property
+    def _built_loops(self) -> list[np.ndarray]:
+        """The tables that have already been tokenized into structured arrays."""
+        return [table for table in self._loops if not isinstance(table, tuple)]
+
+    def _build_deferred_loops(self, predicate: Callable | None = None):
+        """Tokenize the deferred tables whose labels satisfy ``predicate``, or all.
+
+        Deferred tables are stored in :attr:`_loops` as a tuple of their column labels
+        and the ``(source, start, stop)`` span of their body. They are replaced in place
+        by their structured array, or removed if the table is malformed.
+        """
+        if not self._lazy:
+            return
+        selected = {
+            position
+            for position, table in enumerate(self._loops)
+            if isinstance(table, tuple) and (predicate is None or predicate(table[0]))
+        }
+        if not selected:
+            return  # Keep the list of tables, and anything derived from it, unchanged
+
+        loops = [*self._loops]
+        uncertainties = [self._table_uncertainties(i) for i in range(len(loops))]
+        self._loops.clear()  # Keep the same list, so its version keeps increasing
+        self._uncertainties = []
+        for position, table in enumerate(loops):
+            if position not in selected:
+                self._uncertainties.append((table, uncertainties[position]))
+                self._loops.append(table)
+                continue
+
+            loop_keys, (source, start, stop) = table
+            body = _read_span(source, start, stop)
+            self._add_loop(loop_keys, self._tokenize_loop_body(body))
+
+        if self._mapped is not None and len(self._built_loops) == len(self._loops):
+            self._mapped.close()  # Every table is built, so the mapping can be released
+            self._mapped = None
+
+    def _parse_mapped(self, path: str | Path):
+        """Memory-map a file and parse the mapped bytes with the buffer engine."""
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return  # Empty files cannot be mapped
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with memoryview(mapped) as buf:
+            self._parse_buffer(buf)
+
+        if len(self._built_loops) == len(self._loops):
+            mapped.close()
+        else:
+            self._mapped = mapped  # Keep the mapping open to build deferred tables
+
+    def _add_pair(self, key: str, val: str) -> bool:
+        """Save a key-value pair, returning False if the key is a duplicate."""
+        if self._pairs.get(key, None) is not None:
+            msg = (
+                f"Duplicate key `{key}` found:"
+                f"\n (old -> new) : (`{self._pairs[key]}` -> `{val}`)"
+            )
+            _warn_or_err(msg, self._strict)
+            return False
+        self._pairs[key] = (
+            _try_cast_to_numeric(_strip_quotes(val))
+            if self.cast_values
+            else val.rstrip()  # Skip trailing newlines
+        )
+        return True
+
+    def _add_loop(self, loop_keys: list[str], loop_data: list[str]):
+        """Build a structured array from a flat list of table entries and save it."""
+        if self._check_loop(loop_keys, len(loop_data), len(self._loops)):
+            self._append_table(_structured_table(loop_keys, loop_data))
+
+    def _check_loop(self, loop_keys: list[str], n_elements: int, position: int) -> bool:
+        """Check that a table of ``n_elements`` entries can be built, or warn.
+
+        Returns whether the table should be kept. ``position`` is the index of the
+        table in :attr:`_loops`, which is reported in warnings.
+        """
+        n_cols = len(loop_keys)
+
+        if n_cols == 0:
+            return False  # Skip empty tables
+
+        if n_elements % n_cols != 0:
+            msg = (
+                f"CifFile('{self._fn}') : "
+                f"Parsed data for table {position + 1} cannot be"
+                f" resolved into a table of the expected size and will be "
+                f"ignored. \nGot n={n_elements} items, which cannot be "
+                f"distributed evenly into {n_cols} columns with labels: "
+                f"\n{loop_keys}"
+            )
+            _warn_or_err(msg, self._strict)
+            return False
+
+        if n_elements == 0:
+            msg = "Loop data is empty, but n_cols > 0: check CIF file syntax."
+            _warn_or_err(msg, self._strict)
+            return False
+
+        if len(set(loop_keys)) < len(loop_keys):
+            msg = "Duplicate loop keys detected - table will not be processed."
+            _warn_or_err(msg, self._strict)
+            return False
+        return True
+
+    def _plan_chunks(
+        self, tables: Iterable[np.ndarray]
+    ) -> tuple[dict[str, str] | None, dict[str, np.ndarray] | None, set[str]]:
+        """Find the column kinds and categories of a table from its chunks of strings.
+
+        Chunks of a table must be stored in the same format as the whole table would
+        be, so the kind of each column (with ``typed_loops``) and the distinct values of
+        each encoded column (with ``categorical``) are found for the whole table first.
+        Returns the kinds, the categories, and the labels of numeric columns with
+        uncertainties.
+        """
+        typed, categorical = self._typed_loops, self._categorical
+        categorical = categorical and self._string_storage != "stringdtype"
+        kinds, distinct, with_sigma, n_rows = {}, {}, set(), 0
+        for table in tables:
+            n_rows += len(table)
+            for label in table.dtype.names:
+                column = np.ascontiguousarray(table[label]).ravel()
+                if typed and kinds.get(label) != "str":
+                    kind, _, sigma, _ = _parse_typed_column(column)
+                    if sigma is not None and not np.isnan(sigma).all():
+                        with_sigma.add(label)
+                    kinds[label] = _combine_kinds(kinds.get(label), kind)
+                if not categorical or distinct.get(label, ()) is None:
+                    continue
+                if self._is_categorical is None or self._is_categorical(label):
+                    values = np.union1d(distinct.get(label, column[:0]), column)
+                    # Stop collecting columns with too many values to be encoded
+                    too_many = len(values) > self.__class__._MAX_CATEGORIES
+                    auto = self._is_categorical is None
+                    distinct[label] = None if auto and too_many else values
+                else:
+                    distinct[label] = None
+
+        # Columns with no present entries are kept as strings, as in whole tables
+        kinds = {k: "str" if v == "empty" else v for k, v in kinds.items()}
+        with_sigma = {label for label in with_sigma if kinds[label] != "str"}
+        kinds = kinds if typed else None
+        categories = None
+        if categorical:
+            categories = {}
+            for label, values in distinct.items():
+                if values is None or (kinds is not None and kinds[label] != "str"):
+                    continue
+                if self._is_categorical is None and 2 * len(values) > n_rows:
+                    continue
+                categories[label] = _narrow_table(
+                    _table_from_columns({label: values}, values.shape),
+                    self._string_storage,
+                )[label]
+        return kinds, categories, with_sigma
+
+    def _chunk_table(
+        self,
+        table: np.ndarray,
+        kinds: dict[str, str] | None,
+        categories: dict[str, np.ndarray] | None,
+        with_sigma: set[str],
+    ) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """Convert a chunk of rows read from a deferred table to its storage format."""
+        table, uncertainties = self._finish_table(table, kinds, categories)
+        for label in with_sigma - set(uncertainties):
+            uncertainties[label] = np.full(table.shape, np.nan)
+        return table, uncertainties
+
+    def _append_table(self, table: np.ndarray):
+        """Save a structured table of strings in the requested storage format."""
+        table, uncertainties = self._finish_table(table)
+        self._uncertainties.append((table, uncertainties))
+        self._loops.append(table)
+
+    def _table_uncertainties(self, position: int) -> dict[str, np.ndarray]:
+        """Return the uncertainties of the table at ``position`` in :attr:`_loops`.
+
+        Uncertainties are stored with their table in a list parallel to :attr:`_loops`.
+        Tables are matched by identity, so tables that were added or replaced through
+        :attr:`~.loops` have no uncertainties, even if the list was reordered.
+        """
+        table = self._loops[position]
+        if position < len(self._uncertainties):
+            stored, uncertainties = self._uncertainties[position]
+            if stored is table:
+                return uncertainties
+        return next((u for stored, u in self._uncertainties if stored is table), {})
+
+    def _finish_table(
+        self,
+        table: np.ndarray,
+        kinds: dict[str, str] | None = None,
+        categories: dict[str, np.ndarray] | None = None,
+    ) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """Convert a structured table of strings to the requested storage format.
+
+        The column kinds and categories of a table can be given, to convert chunks of
+        the table in the same way as the whole table.
+        """
+        uncertainties = {}
+        if self._typed_loops:
+            table, uncertainties = _typed_table(table, kinds)
+        if self._string_storage == "stringdtype":
+            return _string_dtype_table(table), uncertainties
+        table = _narrow_table(table, self._string_storage)
+        if self._categorical:
+            table = _categorical_table(
+                table,
+                self._is_categorical,
+                self.__class__._MAX_CATEGORIES,
+                categories,
+            )
+        return table, uncertainties
+
     def _strip_comments(self, line: str) -> str:
         return self._cpat["comment"].sub("", line)
 
     def __repr__(self):
         n_pairs = len(self.pairs)
-        n_tabs = len(self.loops)
+        n_tabs = len(self._loops)  # Deferred tables are counted without being built
         return (
             f"CifFile(file='{self._fn}') : {n_pairs} data entries, {n_tabs} data loops"
         )
@@ -1144,8 +2292,10 @@ class CifFile:
         "key_value_general": rf"^(_{_CIF_KEY}+?)\s{_PROG_PLUS}({_ANY}+?)$",
         # Matcher for the first token of <LoopHeader> syntactic units
         "loop_delimiter": rf"(loop_){_WHITESPACE}{_PROG_STAR}([^\n]{_PROG_STAR})",
-        # Matcher for <DataBlock> syntactic units. Currently, these are ignored.
-        "block_delimiter": rf"(data_){_WHITESPACE}{_PROG_STAR}([^\n]{_PROG_STAR})",
+        # Matcher for the header of <DataBlock> syntactic units
+        "block_delimiter": rf"((?i:data_)){_WHITESPACE}{_PROG_STAR}([^\n]{_PROG_STAR})",
+        # Matcher for the start of each <DataBlock>, skipping over text fields
+        "block_start": rf"(?m)^(?:;(?s:.*?)\n;|(?P<block>{_INDENT}(?i:data_)))",
         # Matcher for the column labels of a <LoopHeader> syntactic unit
         "key_list": rf"_{_CIF_KEY}+?(?=\s|$)",
         # Matcher for <LoopBody> syntactic units, which may span multiple lines.
@@ -1166,6 +2316,29 @@ class CifFile:
         ),
         # Matcher for <Comments> syntactic units
         "comment": "#.*?$",
+        # Matcher for a physical line and the nonsimple data entry that may follow it,
+        # which together form a single logical line of a file.
+        "logical_line": rf"(?m)^(?P<first>[^\n]*){_EOL}(?P<block>{_NONSIMPLE_BLOCK})?",
+        # Master pattern for the buffer engine, which matches one syntactic unit at the
+        # start of a line: a run of lines that contain no data, an entire <Loop>
+        # (keyword, <LoopHeader>, and <LoopBody>), a single-line <DataItems>, or any
+        # other logical line. The <LoopBody> extends until the next key or loop_.
+        "buffer_unit": (
+            "(?m)^(?:"
+            rf"(?P<skip>(?:{_INDENT}(?:#[^\n]*)?\n(?!{_INDENT}['\";]))+)|"
+            "(?P<loop>"
+            rf"(?P<loop_line>{_INDENT}(?i:loop_)[^\n]*{_EOL}(?:{_NONSIMPLE_BLOCK})?"
+            rf"(?:(?={_INDENT}['\"])[^\n]*\n?)?)"
+            rf"(?P<loop_header>(?:{_INDENT}(?:_[^\s#]+(?:[^\S\n]+|(?=[#\n]|\Z)))+"
+            rf"(?:#[^\n]*)?{_EOL}(?:{_NONSIMPLE_BLOCK})?)*)"
+            rf"(?P<loop_body>(?:(?!{_INDENT}(?:_|loop_|(?i:data_)))[^\n]*{_EOL}"
+            rf"(?:{_NONSIMPLE_BLOCK})?){_PROG_STAR})"
+            ")|"
+            rf"(?P<pair>(?P<key>_[^\s#]+)[^\S\n]+(?P<value>[^\s#](?:[^\n#]*?[^\s#])?)"
+            rf"[^\S\n]*(?:#[^\n]*)?{_EOL}(?!{_NONSIMPLE_DELIMITER}))|"
+            rf"(?P<line>(?P<line_first>[^\n]*{_EOL})(?P<line_block>{_NONSIMPLE_BLOCK})?)"
+            ")"
+        ),
         # Matcher for CIF 2.0 <list>-related tokens
         # https://www.iucr.org/__data/assets/text_file/0009/112131/CIF2-ENBF.txt
         "bracket": r"(\[|\])",
@@ -1184,20 +2357,1067 @@ class CifFile:
     """
 
     _SYMOP_KEYS = (
-        "_symmetry_equiv?pos_as_xyz",
-        "_space_group_symop?operation_xyz",
+        "_symmetry_equiv_pos_as_xyz",
+        "_space_group_symop_operation_xyz",
     )
     """Keys required to extract symmetry operations from CIF & mmCIF files."""
     _WYCKOFF_KEYS = (
-        "_atom_site?fract_x",
-        "_atom_site?fract_y",
-        "_atom_site?fract_z",
-        "_atom_site?Cartn_x",
-        "_atom_site?Cartn_y",
-        "_atom_site?Cartn_z",
+        "_atom_site_fract_x",
+        "_atom_site_fract_y",
+        "_atom_site_fract_z",
+        "_atom_site_Cartn_x",
+        "_atom_site_Cartn_y",
+        "_atom_site_Cartn_z",
     )
     """Keys required to extract Wyckoff site data from CIF & mmCIF files.
 
     Note that per the specification, only the *fract_? or *Cartn_? keys may be included
     but not both.
     """
+
+
+def _read_span(buf: str | bytes | memoryview | mmap.mmap, start: int, stop: int) -> str:
+    """Read a slice of a text or binary buffer as a string."""
+    return buf[start:stop] if isinstance(buf, str) else _decode_bytes(buf[start:stop])
+
+
+def _structured_table(
+    loop_keys: list[str], loop_data: list[str] | np.ndarray
+) -> np.ndarray:
+    """Build a labeled :math:`(N, 1)` structured array from a flat list of entries."""
+    n_cols = len(loop_keys)
+    if isinstance(loop_data, np.ndarray):
+        dt = loop_data.dtype
+    else:
+        dt = _dtype_from_int(max(map(len, loop_data)))
+    rectable = np.asarray(loop_data, dtype=dt).reshape(-1, n_cols)
+    labeled_type = [*zip(loop_keys, [dt] * n_cols, strict=True)]
+    return rectable.view(labeled_type)
+
+
+def _typed_table(
+    table: np.ndarray, kinds: dict[str, str] | None = None
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """Convert the numeric columns of a structured table of strings to numbers.
+
+    Characters are classified directly from the code points of each column, so
+    string columns are rejected without parsing their entries. Numeric columns are
+    then parsed from the same code points, as in :func:`~.patterns.parse_numeric`.
+    Returns the converted table and a dict of the standard uncertainties of each
+    numeric column that has any.
+
+    If ``kinds`` is given, each column is converted to the kind given for its label
+    rather than the kind of its own entries, which must be compatible. This is used to
+    convert the chunks of a table to the kinds found for the whole table.
+    """
+    columns, uncertainties = {}, {}
+    for label in table.dtype.names:
+        column = np.ascontiguousarray(table[label]).ravel()
+        kind, values, sigma, missing = _parse_typed_column(column)
+        kind = kind if kinds is None else kinds[label]
+        if kind in {"empty", "str"}:
+            columns[label] = table[label]
+            continue
+        if kind == "int":
+            columns[label] = values.astype(np.int64).reshape(table.shape)
+        else:
+            columns[label] = np.full(column.shape, np.nan)
+            if values is not None:
+                columns[label][~missing] = values
+            columns[label] = columns[label].reshape(table.shape)
+
+        if sigma is not None and not np.isnan(sigma).all():
+            uncertainties[label] = np.full(column.shape, np.nan)
+            uncertainties[label][~missing] = sigma
+            uncertainties[label] = uncertainties[label].reshape(table.shape)
+
+    return _table_from_columns(columns, table.shape), uncertainties
+
+
+def _combine_kinds(first: str | None, second: str) -> str:
+    """Find the kind of a column from the kinds of two of its parts."""
+    if first is None or first == second:
+        return second
+    if "str" in {first, second}:
+        return "str"
+    return "float"  # Combining integers with floats or missing entries
+
+
+def _parse_typed_column(
+    column: np.ndarray,
+) -> tuple[str, np.ndarray | None, np.ndarray | None, np.ndarray]:
+    """Classify a column of strings, and parse it if every entry is a number.
+
+    Returns the kind of the column, the values and uncertainties of its present
+    entries (or None if the column is not numeric), and the mask of missing entries.
+    The kind is ``"empty"`` if every entry is missing, ``"str"`` if any present entry
+    is not a number, ``"int"`` if every entry is an integer that fits in ``int64``,
+    and ``"float"`` otherwise.
+    """
+    codes = column.view(_code_dtype(column.dtype)).reshape(len(column), -1)
+    missing = np.isin(codes[:, 0], (ord("."), ord("?")))
+    if codes.shape[1] > 1:
+        missing &= codes[:, 1] == 0
+    present = codes[~missing] if missing.any() else codes
+    if len(present) == 0:
+        return "empty", None, None, missing
+    # Check the first entry before the rest, as most string columns fail at once
+    if not _NUMERIC_CHAR_KINDS[np.minimum(present[0], 128)].all():
+        return "str", None, None, missing
+    kinds = _NUMERIC_CHAR_KINDS[np.minimum(present, 128)]
+    if not kinds.all():
+        return "str", None, None, missing
+    values, sigma, is_valid, is_exact = _parse_numeric_codes(
+        present, handle_fractions=False
+    )
+    if not is_valid.all():
+        return "str", None, None, missing
+    # Entries with too many digits are parsed from their strings instead
+    paren = "(" if column.dtype.kind == "U" else b"("
+    if not is_exact.all():
+        values[~is_exact] = np.char.partition(column[~missing][~is_exact], paren)[
+            ..., 0
+        ].astype(np.float64)
+
+    if missing.any() or (kinds == _FLOAT_CHAR).any():
+        return "float", values, sigma, missing
+    if np.abs(values).max() >= _MAX_EXACT_INTEGER:
+        try:
+            values = np.char.partition(column, paren)[..., 0].astype(np.int64)
+        except (ValueError, OverflowError):
+            return "str", None, None, missing
+    return "int", values, sigma, missing
+
+
+def _narrow_table(
+    table: np.ndarray, string_storage: Literal["unicode", "bytes"] = "unicode"
+) -> np.ndarray:
+    """Store each string column of a structured table with its own, narrowest width.
+
+    String columns may be ``<U{n}`` or ASCII ``S{n}`` arrays. With
+    ``string_storage="bytes"``, columns that only contain ASCII characters are stored
+    as ``S{n}`` bytes, and all other string columns are stored as ``<U{n}`` strings.
+    The widths and character ranges of each column are found from its code points, and
+    each column is then copied into place in the raw bytes of the new table.
+    """
+    table = np.ascontiguousarray(table)
+    labels, n_rows = table.dtype.names, table.size
+    dtypes = {table.dtype[label] for label in labels}
+    if len(dtypes) == 1 and (dtype := dtypes.pop()).kind in "US":
+        # Read the code points of every column in a single pass
+        codes = table.view(_code_dtype(dtype)).reshape(n_rows, len(labels), -1)
+        columns = dict(zip(labels, np.moveaxis(codes, 1, 0), strict=True))
+        max_codes = codes.max(axis=0) if n_rows else np.zeros(codes.shape[1:], int)
+        max_codes = dict(zip(labels, max_codes, strict=True))
+    else:
+        columns, max_codes = {}, {}
+        for label in labels:
+            column = np.ascontiguousarray(table[label]).ravel()
+            if column.dtype.kind in "US":
+                column = column.view(_code_dtype(column.dtype)).reshape(n_rows, -1)
+                max_codes[label] = column.max(axis=0) if n_rows else column[0]
+            columns[label] = column
+
+    fields = []
+    for label in labels:
+        if label not in max_codes:
+            fields.append((label, columns[label].dtype))
+            continue
+        used = np.flatnonzero(max_codes[label])
+        width = int(used[-1]) + 1 if len(used) else 1
+        max_codes[label] = max_codes[label][:width]
+        if string_storage == "bytes" and max_codes[label].max(initial=0) < 128:
+            fields.append((label, f"S{width}"))
+        else:
+            fields.append((label, _dtype_from_int(width)))
+
+    narrowed = np.empty(table.shape, dtype=fields)
+    raw = narrowed.view(np.uint8).reshape(n_rows, -1)
+    for label, (dtype, offset) in narrowed.dtype.fields.items():
+        if label not in max_codes:
+            narrowed[label] = columns[label].reshape(table.shape)
+            continue
+        width = len(max_codes[label])
+        target = raw[:, offset : offset + dtype.itemsize]
+        target = target if dtype.kind == "S" else target.view("<u4")
+        target[...] = columns[label][:, :width]
+    return narrowed
+
+
+_VERSIONS = count()
+"""Version numbers shared by every versioned container, so no two states collide."""
+
+
+class _VersionedDict(dict):
+    """A dict with a new version after each change, to invalidate derived data."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = next(_VERSIONS)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.version = next(_VERSIONS)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.version = next(_VERSIONS)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        super().clear()
+        self.version = next(_VERSIONS)
+
+    def pop(self, *args):
+        self.version = next(_VERSIONS)
+        return super().pop(*args)
+
+    def popitem(self):
+        self.version = next(_VERSIONS)
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        self.version = next(_VERSIONS)
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.version = next(_VERSIONS)
+
+
+class _VersionedList(list):
+    """A list with a new version after each change, to invalidate derived data.
+
+    Only changes to the list itself are counted, not changes to the items it holds.
+    """
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.version = next(_VERSIONS)
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self.version = next(_VERSIONS)
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self.version = next(_VERSIONS)
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def __imul__(self, n):
+        super().__imul__(n)
+        self.version = next(_VERSIONS)
+        return self
+
+    def append(self, item):
+        super().append(item)
+        self.version = next(_VERSIONS)
+
+    def clear(self):
+        super().clear()
+        self.version = next(_VERSIONS)
+
+    def extend(self, items):
+        super().extend(items)
+        self.version = next(_VERSIONS)
+
+    def insert(self, index, item):
+        super().insert(index, item)
+        self.version = next(_VERSIONS)
+
+    def pop(self, *args):
+        self.version = next(_VERSIONS)
+        return super().pop(*args)
+
+    def remove(self, item):
+        super().remove(item)
+        self.version = next(_VERSIONS)
+
+    def reverse(self):
+        super().reverse()
+        self.version = next(_VERSIONS)
+
+    def sort(self, **kwargs):
+        super().sort(**kwargs)
+        self.version = next(_VERSIONS)
+
+
+def _copy_result(result):
+    """Copy the arrays and lists of a cached result, so callers cannot modify it."""
+    if isinstance(result, np.ndarray):
+        return result.copy()
+    if isinstance(result, list):
+        return [*result]
+    if isinstance(result, tuple):
+        return tuple(_copy_result(item) for item in result)
+    return result
+
+
+class _TypedPairs(Mapping):
+    """A read-only mapping of key-value pairs that casts each value on first access.
+
+    The typed value and standard uncertainty of each key are cached together, and are
+    parsed again only if the raw value of that key has changed.
+    """
+
+    def __init__(self, pairs: dict[str, str]):
+        self._pairs = pairs
+        self._cache = {}
+
+    def _parse(self, key: str) -> tuple[str | int | float, float]:
+        raw = self._pairs[key]
+        cached = self._cache.get(key)
+        if cached is None or cached[0] is not raw:
+            if isinstance(raw, str):
+                cached = (raw, *_parse_numeric_value(_strip_quotes(raw).strip()))
+            else:
+                cached = (raw, raw, np.nan)
+            self._cache[key] = cached
+        return cached[1:]
+
+    def __getitem__(self, key: str) -> str | int | float:
+        return self._parse(key)[0]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._pairs)
+
+    def __len__(self) -> int:
+        return len(self._pairs)
+
+    def uncertainty(self, key: str) -> float:
+        """Return the standard uncertainty of a value, or ``nan`` if it has none."""
+        return self._parse(key)[1]
+
+
+class _LabeledTable(np.ndarray):
+    """An :math:`(N, M)` array of table entries, with a label for each column.
+
+    This stores tables whose dtype cannot be a field of a structured array, such as
+    :class:`numpy.dtypes.StringDType`. Slices of rows keep the column labels.
+    """
+
+    def __new__(cls, array: np.ndarray, labels: Iterable[str]):
+        table = np.asarray(array).view(cls)
+        table.labels = tuple(labels)
+        return table
+
+    def __array_finalize__(self, obj):
+        self.labels = getattr(obj, "labels", None)
+
+
+def _string_dtype_table(table: np.ndarray) -> _LabeledTable:
+    """Convert a structured table of strings to a table of variable-width strings."""
+    labels = table.dtype.names
+    entries = np.empty((table.size, len(labels)), dtype=np.dtypes.StringDType())
+    for i, label in enumerate(labels):
+        entries[:, i] = table[label].ravel()
+    return _LabeledTable(entries, labels)
+
+
+def _table_labels(table: np.ndarray) -> tuple[str, ...]:
+    """Return the column labels of a structured array or a labeled table."""
+    return table.dtype.names if table.dtype.names is not None else table.labels
+
+
+def _select_columns(
+    table: np.ndarray, labels: list[str], copy: bool = True
+) -> np.ndarray:
+    """Return the columns of a table with the given labels, as an unstructured array.
+
+    If ``copy`` is False, a read-only view of the table is returned where the columns
+    can be selected without copying them.
+    """
+    if table.dtype.names is not None:
+        table = table[labels]
+        if any(_categories(table.dtype[label]) is not None for label in labels):
+            # The decoded table is not stored, so it does not need to be copied again
+            decoded = _table_from_columns(
+                {label: _decode_column(table[label]) for label in labels}, table.shape
+            )
+            return structured_to_unstructured(
+                decoded, copy=False, casting="safe"
+            ).squeeze(axis=1)
+        return CifFile.structured_to_unstructured(table, copy=copy).squeeze(axis=1)
+    columns = [table.labels.index(label) for label in labels]
+    step = columns[1] - columns[0] if len(columns) > 1 else 1
+    if copy or step <= 0 or columns != [*range(columns[0], columns[-1] + 1, step)]:
+        return np.asarray(table)[:, columns]
+    return _read_only(np.asarray(table)[:, columns[0] : columns[-1] + 1 : step], table)
+
+
+def _read_only(array: np.ndarray, base: np.ndarray) -> np.ndarray:
+    """Return ``array`` as a read-only view if it shares memory with ``base``."""
+    if np.may_share_memory(array, base):
+        array = array.view()
+        array.flags.writeable = False
+    return array
+
+
+def _code_dtype(dtype: np.dtype) -> str:
+    """Return the dtype of the code points of a ``<U{n}`` or ``S{n}`` dtype."""
+    return "<u4" if dtype.kind == "U" else "u1"
+
+
+def _categorical_table(
+    table: np.ndarray,
+    is_categorical: Callable | None,
+    max_categories: int,
+    categories: dict[str, np.ndarray] | None = None,
+) -> np.ndarray:
+    """Dictionary-encode string columns of a structured table.
+
+    Each encoded column stores the index of each entry in the sorted array of its
+    distinct values, which is kept in the ``"categories"`` metadata of the column dtype
+    so that it follows the column through slices and copies. If ``is_categorical`` is
+    None, string columns with at most ``max_categories`` distinct values, which each
+    appear at least twice on average, are encoded. Otherwise, string columns whose
+    labels satisfy ``is_categorical`` are encoded.
+
+    If ``categories`` is given, only the columns it contains are encoded, with the
+    given sorted distinct values. This is used to encode the chunks of a table with the
+    categories found for the whole table.
+    """
+    columns = {}
+    for label in table.dtype.names:
+        column = table[label]
+        columns[label] = column
+        if column.dtype.kind not in "US":
+            continue
+        if categories is not None:
+            if label not in categories:
+                continue
+            values = categories[label]
+            if values.dtype.kind != column.dtype.kind:
+                column = column.astype(values.dtype.kind)
+            codes = np.searchsorted(values, column)
+        elif is_categorical is None:
+            # Reject columns with many distinct values without sorting every entry
+            if len(np.unique(column[:1000])) > max_categories:
+                continue
+            values, codes = np.unique(column, return_inverse=True)
+            if len(values) > max_categories or 2 * len(values) > column.size:
+                continue
+        elif is_categorical(label):
+            values, codes = np.unique(column, return_inverse=True)
+        else:
+            continue
+
+        code_type = np.min_scalar_type(max(len(values) - 1, 0))
+        columns[label] = codes.astype(code_type).view(
+            np.dtype(code_type, metadata={"categories": values})
+        )
+    return _table_from_columns(columns, table.shape)
+
+
+def _categories(dtype: np.dtype) -> np.ndarray | None:
+    """Return the distinct values of a dictionary-encoded column, or None."""
+    return (dtype.metadata or {}).get("categories")
+
+
+def _decode_column(column: np.ndarray) -> np.ndarray:
+    """Replace the codes of a dictionary-encoded column by their values."""
+    values = _categories(column.dtype)
+    return column if values is None else values[column.astype(column.dtype.str)]
+
+
+def _present_entries(column: np.ndarray) -> np.ndarray:
+    """Return the entries of a table column that are not missing, as strings."""
+    if column.dtype.kind in "fi":
+        return column.astype(str)[column == column][:, None]  # Drop NaN values
+    column = _fixed_width_strings(column)
+    return column[(column != ".") & (column != "?")][:, None]
+
+
+def _fixed_width_strings(column: np.ndarray) -> np.ndarray:
+    """Convert an array of bytes or variable-width strings to ``<U{n}`` strings."""
+    if column.dtype.kind == "T":
+        width = max(int(np.char.str_len(column).max(initial=0)), 1)
+        return column.astype(_dtype_from_int(width))
+    return column.astype(str)
+
+
+def _table_from_columns(columns: dict[str, np.ndarray], shape: tuple) -> np.ndarray:
+    """Build a structured array of the given shape from a dict of labeled columns."""
+    table = np.empty(shape, dtype=[(k, v.dtype) for k, v in columns.items()])
+    for label, column in columns.items():
+        table[label] = column.reshape(shape)
+    return table
+
+
+def _iter_table_entries(
+    buf: str | bytes | memoryview | mmap.mmap, start: int, stop: int, cpat: dict
+) -> Iterator[list[str]]:
+    """Yield the data entries of each logical line in a table body, one at a time."""
+    if isinstance(buf, str):
+        logical_line = cpat["logical_line"]
+    else:
+        logical_line = re.compile(cpat["logical_line"].pattern.encode())
+
+    for line in logical_line.finditer(buf, start, stop):
+        block = None
+        if line["block"] is not None:
+            block = _read_span(buf, *line.span("block"))
+        yield _split_table_line(_read_span(buf, *line.span("first")), block, cpat)
+
+
+def _count_table_entries(
+    buf: str | bytes | mmap.mmap, start: int, stop: int, cpat: dict
+) -> int:
+    """Count the data entries in a table body without building them.
+
+    Blocks of whole lines without quotes, semicolons, or comments are counted by
+    splitting them on whitespace, as :func:`_split_table_line` would. The last line of
+    each block is also checked but left to the next block, since it could open a text
+    field that belongs to the logical line before it. From the first block that is not
+    simple, the rest of the body is tokenized line by line.
+    """
+    newline = "\n" if isinstance(buf, str) else b"\n"
+    n_entries = 0
+    while start < stop:
+        window_end = buf.rfind(newline, start, min(start + _COUNT_BLOCK_SIZE, stop)) + 1
+        end = buf.rfind(newline, start, window_end - 1) + 1 if window_end else 0
+        if end <= start:
+            break
+        window = _read_span(buf, start, window_end)
+        if "'" in window or '"' in window or ";" in window or "#" in window:
+            break
+        n_entries += len(window[: window.rfind("\n", 0, -1) + 1].split())
+        start = end
+    return n_entries + sum(map(len, _iter_table_entries(buf, start, stop, cpat)))
+
+
+def _key_matcher(keys: Iterable[str], cpat: dict) -> Callable:
+    """Build a case-insensitive matcher for keys that may contain wildcards.
+
+    Keys without wildcards also match their spelling in the other dialect.
+    """
+    patterns = [
+        translate(cpat["bracket"].sub(r"[\1]", key))
+        if _contains_wildcard(key)
+        else re.sub(r"\\\.|_", "[._]", re.escape(key)) + r"\Z"
+        for key in keys
+    ]
+    return re.compile("|".join(patterns) or "(?!)", re.IGNORECASE).match
+
+
+def _split_simple_table(body: str) -> np.ndarray | None:
+    """Split a table body with no quotes or text fields in bulk.
+
+    Bodies of plain ASCII tokens separated by whitespace (the common case for large
+    tables of coordinates) are tokenized with a handful of array operations on the
+    encoded bytes rather than per-line regular expressions. Each entry is gathered
+    from a strided window starting at its first byte, and the padded ASCII codes are
+    viewed directly as a bytes array. Returns None if the body is not simple.
+
+    Parameters
+    ----------
+    body : str
+        The text of a table body, following its column labels.
+
+    Returns
+    -------
+    :class:`numpy.ndarray` | None
+        A flat ``S{n}`` array of the entries in the body, or None if the fast path
+        does not apply.
+    """
+    if not body.isascii():
+        return None
+    raw = body.encode("ascii")
+    if raw.translate(None, _SIMPLE_TABLE_BYTES):
+        return None  # The body contains quotes, text fields, or control characters
+    if b"#" in raw:
+        raw = re.sub(rb"#[^\n]*", b"", raw)
+
+    data = np.frombuffer(raw, dtype=np.uint8)
+    space = np.frombuffer(raw.translate(_WHITESPACE_TABLE), dtype=np.int8)
+    edges = np.flatnonzero(np.diff(space, prepend=np.int8(1), append=np.int8(1)))
+    starts, lengths = edges[::2], edges[1::2] - edges[::2]
+    if len(starts) == 0:
+        return np.array([], dtype=_dtype_from_int(1))
+
+    width = int(lengths.max())
+    padded = np.concatenate([data, np.zeros(width, dtype=np.uint8)])
+    windows = np.lib.stride_tricks.as_strided(
+        padded, shape=(len(data), width), strides=(1, 1), writeable=False
+    )[starts]
+    windows[np.arange(width) >= lengths[:, None]] = 0
+    return windows.view(f"S{width}").ravel()
+
+
+def _split_table_line(first: str, block: str | None, cpat: dict) -> list[str]:
+    """Split a logical line from the body of a table into its data entries."""
+    line = _strip_comments(first) + (block or "")
+    if "'" not in line and '"' not in line and ";" not in line:
+        return line.split()
+    return [
+        m for m in cpat["space_delimited_data"].findall(line) if m != "" and m != ","
+    ]
+
+
+def _scan_buffer(
+    buf: str | bytes | memoryview, cpat: dict, pos: int = 0, endpos: int | None = None
+) -> Iterator[tuple]:
+    """Yield the data blocks, key-value pairs, and tables in a buffer, in file order.
+
+    Events are yielded as ``("block", span, name)``, ``("pair", span, key, value)``,
+    and ``("loop", span, labels, start, stop)``, where ``span`` is the ``(start, stop)``
+    position of the entire unit in the buffer, and ``start`` and ``stop`` delimit the
+    table body. Tables are not tokenized here, so callers may build, stream, or defer
+    them as needed.
+    """
+    if isinstance(buf, str):
+        unit_pattern = cpat["buffer_unit"]
+        line_pattern = re.compile(r"[^\n]*\n?")
+    else:
+        unit_pattern = re.compile(cpat["buffer_unit"].pattern.encode())
+        line_pattern = re.compile(rb"[^\n]*\n?")
+
+    def text(match: re.Match, group: str | int) -> str:
+        return _read_span(buf, *match.span(group))
+
+    def strip_comments(line: str) -> str:
+        return cpat["comment"].sub("", line)
+
+    end = len(buf) if endpos is None else endpos
+    while pos < end:
+        match = unit_pattern.match(buf, pos, end)
+        pos = match.end()
+        kind = match.lastgroup
+
+        if kind == "pair":
+            yield ("pair", match.span(), text(match, "key"), text(match, "value"))
+
+        elif kind == "line":
+            line = strip_comments(text(match, "line_first"))
+            if match["line_block"] is not None:
+                line += text(match, "line_block")
+            pair = cpat["key_value_general"].match(strip_comments(line).rstrip())
+
+            # If we have a COD-style _key\n'long_value'
+            if pair is None:
+                next_line = line_pattern.match(buf, pos, end)
+                if text(next_line, 0).lstrip()[:1] in {"'", '"'}:
+                    pos = next_line.end()
+                    pair = cpat["key_value_general"].match(
+                        strip_comments(line + text(next_line, 0))
+                    )
+
+            if pair is not None:
+                yield ("pair", (match.start(), pos), *pair.groups())
+            elif (block := cpat["block_delimiter"].match(line.lstrip())) is not None:
+                yield ("block", match.span(), block[2].strip())
+
+        elif kind == "loop":
+            loop = cpat["loop_delimiter"].match(
+                strip_comments(text(match, "loop_line").lower()).lstrip()
+            )
+            loop_keys = []
+
+            # First, extract table headers. Must be prefixed with underscore
+            line_groups = loop.groups()
+            if line_groups[-1] != "":  # Extract loop keys from the _loop line
+                fragment = _strip_comments(line_groups[-1].strip())
+                if fragment[:1] != "_":
+                    pos = match.end("loop_line")  # Reparse the following lines
+                    continue
+                loop_keys.extend(cpat["key_list"].findall(fragment))
+
+            header = text(match, "loop_header")
+            for line in cpat["logical_line"].finditer(header):
+                loop_keys.extend(
+                    cpat["key_list"].findall(
+                        _strip_comments(line["first"]) + (line["block"] or "")
+                    )
+                )
+
+            yield ("loop", match.span(), loop_keys, *match.span("loop_body"))
+
+
+def iterparse(
+    file: str | Path | TextIO | Iterable[str],
+    cast_values: bool = False,
+    strict: bool = False,
+) -> Iterator[tuple]:
+    """Iterate over the contents of a CIF file without building a :class:`~.CifFile`.
+
+    Events are yielded in the order they appear in the file, using the same grammar as
+    :attr:`CifFile.PATTERNS`:
+
+    * ``("block", name)`` for each ``data_`` block header.
+    * ``("pair", key, value)`` for each key-value pair. Unlike :attr:`CifFile.pairs`,
+      duplicate keys are yielded each time they occur.
+    * ``("loop_start", labels)``, followed by a ``("row", values)`` event for each row
+      of the table and a final ``("loop_end",)``.
+
+    File paths are memory-mapped and tables are streamed one row at a time, so the
+    memory required is independent of the size of the file. Compressed files cannot be
+    mapped, and are instead decompressed in chunks, one data block at a time.
+
+    Example
+    -------
+    >>> from parsnip import iterparse
+    >>> events = iterparse("example_file.cif")
+    >>> next(events)
+    ('block', 'cif_file')
+    >>> next(events)
+    ('pair', '_journal_year', '1999')
+    >>> [event for event in events if event[0] == "row"][-1]
+    ('row', ('192', 'z+1/2,y+1/2,x'))
+
+    Parameters
+    ----------
+        file : str | Path | TextIO | Iterable[str]
+            A path, file object, or iterable of lines, as in :class:`~.CifFile`.
+        cast_values : bool, optional
+            Whether to convert string numerics in key-value pairs to integers and float.
+            Default value = ``False``
+        strict : bool, optional
+            Whether to raise an error, rather than warn, for malformed tables.
+            Default value = ``False``
+
+    Yields
+    ------
+        tuple:
+            An event tuple, whose first element is the event type.
+    """
+    with _open_segments(file) as segments:
+        yield from _iterparse_segments(segments, file, cast_values, strict)
+
+
+def iter_blocks(
+    file: str | Path | TextIO | Iterable[str], **kwargs
+) -> Iterator[CifFile]:
+    """Iterate over the data blocks of a CIF file, yielding one :class:`~.CifFile` each.
+
+    :class:`~.CifFile` reads every ``data_`` block into a single namespace, which
+    results in duplicate keys for files with many blocks. This function instead splits
+    the file at each block header and parses the blocks one at a time, so only a single
+    block is held in memory. File paths are memory-mapped, or decompressed in chunks if
+    they are compressed, and content before the first block header is ignored unless
+    the file contains no blocks.
+
+    Example
+    -------
+    >>> from parsnip import iter_blocks
+    >>> [(block.block_name, len(block.loops)) for block in iter_blocks("hP3.cif")]
+    [('cif_Se-hP3', 2)]
+
+    Parameters
+    ----------
+        file : str | Path | TextIO | Iterable[str]
+            A path, file object, or iterable of lines, as in :class:`~.CifFile`.
+        **kwargs
+            Additional arguments to :class:`~.CifFile`, such as ``cast_values``,
+            ``lazy``, or ``keys``.
+
+    Yields
+    ------
+        :class:`~.CifFile`:
+            The contents of each data block.
+    """
+    with _open_segments(file) as segments:
+        preamble = _read_span(*next(segments, ("", 0, 0)))
+        n_blocks = 0
+        for segment in segments:
+            n_blocks += 1
+            yield _block_file(_read_span(*segment), file, kwargs)
+        if n_blocks == 0 and preamble:
+            yield _block_file(preamble, file, kwargs)  # The file has no block headers
+
+
+def _block_file(text: str, file, kwargs: dict) -> CifFile:
+    """Parse the text of a single data block read from ``file``."""
+    block = CifFile(io.StringIO(text), **kwargs)
+    block._fn = file
+    return block
+
+
+def _block_spans(buf: str | bytes | memoryview) -> list[tuple[int, int]]:
+    """Find the ``(start, stop)`` span of each data block in a buffer.
+
+    Content before the first block header is skipped, unless the buffer contains no
+    block headers at all. In that case, the entire buffer is treated as one block.
+    """
+    pattern = CifFile.PATTERNS["block_start"]
+    block_start = re.compile(pattern if isinstance(buf, str) else pattern.encode())
+    starts = [
+        match.start()
+        for match in block_start.finditer(buf)
+        if match["block"] is not None
+    ] or ([0] if len(buf) else [])
+    return [*pairwise([*starts, len(buf)])]
+
+
+def build_index(path: str | Path) -> Path:
+    """Write a sidecar index of the byte offsets of the contents of a CIF file.
+
+    The index is saved as JSON next to the file (``<path>.pidx``), and records the
+    byte offsets of each data block, key-value pair, and table. It is used by
+    :meth:`CifFile.open_indexed` to read a single block, or a subset of the keys in a
+    block, without parsing the rest of the file. Rebuilding the index is only required
+    after the file has been modified, which :meth:`CifFile.open_indexed` detects
+    automatically.
+
+    Example
+    -------
+    >>> from parsnip import build_index
+    >>> build_index("hP3.cif")
+    PosixPath('hP3.cif.pidx')
+    >>> CifFile.open_indexed("hP3.cif", keys=["_cell_length_a"]).pairs
+    {'_cell_length_a': '4.36620'}
+
+    .. testcleanup::
+
+        >>> import os
+        >>> os.remove("hP3.cif.pidx")
+
+    Parameters
+    ----------
+        path : str | Path
+            The path to the file to be indexed.
+
+    Returns
+    -------
+        Path:
+            The path to the index file.
+    """
+    path = Path(path)
+    cpat = {k: re.compile(pattern) for (k, pattern) in CifFile.PATTERNS.items()}
+
+    blocks, records, offset = [], [], 0
+    with _open_buffer(path) as buf:
+        for start, stop in _block_spans(buf):
+            name, pairs, loops = None, {}, []
+            for kind, span, *event in _scan_buffer(buf, cpat, start, stop):
+                if kind == "block" and name is None:
+                    name = event[0]
+                elif kind == "pair":
+                    pairs.setdefault(event[0], span)
+                elif kind == "loop" and event[0]:
+                    labels, body_start, body_stop = event
+                    loops.append(
+                        {
+                            "labels": labels,
+                            "span": span,
+                            "body": (body_start, body_stop),
+                        }
+                    )
+
+            record = json.dumps({"pairs": pairs, "loops": loops}, separators=(",", ":"))
+            record = f"{record}\n".encode()
+            blocks.append((name, start, stop, offset, len(record)))
+            records.append(record)
+            offset += len(record)
+
+    stat = os.stat(path)
+    header = {
+        "version": _INDEX_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "blocks": blocks,
+    }
+    index_path = path.with_name(path.name + _INDEX_SUFFIX)
+    with open(index_path, "wb") as f:
+        f.write(f"{json.dumps(header, separators=(',', ':'))}\n".encode())
+        f.writelines(records)
+    return index_path
+
+
+def _read_index_entry(path: Path, block: int | str) -> dict:
+    """Read the index entry for one block of a file, rebuilding the index if needed.
+
+    The index consists of a header line, which lists the name, span, and record location
+    of each block, followed by one record of pair and table offsets for each block. Only
+    the header and the record of the requested block are read.
+    """
+    index_path = path.with_name(path.name + _INDEX_SUFFIX)
+    stat = os.stat(path)
+    for attempt in range(2):
+        if attempt or not index_path.exists():
+            build_index(path)
+        with open(index_path, "rb") as f:
+            header = json.loads(f.readline())
+            if (header["version"], header["size"], header["mtime_ns"]) != (
+                _INDEX_VERSION,
+                stat.st_size,
+                stat.st_mtime_ns,
+            ):
+                continue  # The index is out of date
+
+            blocks = header["blocks"]
+            if isinstance(block, str):
+                matches = [entry for entry in blocks if entry[0] == block]
+                if not matches:
+                    raise KeyError(f"Data block '{block}' not found in {path}.")
+                name, start, stop, offset, length = matches[0]
+            else:
+                name, start, stop, offset, length = blocks[block]
+
+            f.seek(offset, os.SEEK_CUR)
+            return {"name": name, "span": (start, stop), **json.loads(f.read(length))}
+
+    msg = f"Could not build an up-to-date index for {path}."
+    raise RuntimeError(msg)
+
+
+@contextmanager
+def _open_segments(file: str | Path | TextIO | Iterable[str]) -> Iterator:
+    """Provide the contents of a file as ``(buffer, start, stop)`` segments.
+
+    The first segment holds any content before the first block header, and each other
+    segment holds one data block. Compressed files are decompressed in chunks as the
+    segments are read, so only a single block is held in memory at a time. Other files
+    are opened with :func:`_open_buffer` and split with :func:`_block_spans`.
+    """
+    is_path = (
+        isinstance(file, str) and _is_potentially_valid_path(file)
+    ) or isinstance(file, Path)
+    if is_path and (opener := _compressed_opener(file)) is not None:
+        with opener(file, "rb") as f:
+            yield ((buf, 0, len(buf)) for buf in _iter_block_segments(f))
+        return
+
+    with _open_buffer(file) as buf:
+        spans = _block_spans(buf)
+        spans.insert(0, (0, spans[0][0] if spans else len(buf)))
+        yield ((buf, start, stop) for start, stop in spans)
+
+
+def _iter_block_segments(stream: BinaryIO) -> Iterator[bytes]:
+    """Split a binary stream at each data block header, reading it in chunks.
+
+    Yields the content before the first header, and then each data block, as found by
+    :func:`_block_spans`. Only whole lines that are not part of an unfinished text
+    field are searched for headers, and the rest is carried over to the next chunk.
+    """
+    block_start = re.compile(CifFile.PATTERNS["block_start"].encode())
+    text_field = re.compile(rb"(?m)^;")
+    pending, position, at_end = bytearray(), 0, False
+    while not at_end:
+        chunk = stream.read(_DECOMPRESSED_CHUNK_SIZE)
+        pending += chunk
+        at_end = not chunk
+        stop = len(pending) if at_end else pending.rfind(b"\n") + 1
+        while match := block_start.search(pending, position, stop):
+            # Text fields that are not closed yet may contain block headers
+            if not at_end and text_field.search(pending, position, match.start()):
+                break
+            position = match.end()
+            if match["block"] is not None:
+                yield bytes(pending[: match.start()])
+                del pending[: match.start()]
+                position, stop = position - match.start(), stop - match.start()
+        else:
+            if at_end or not text_field.search(pending, position, stop):
+                position = stop
+    yield bytes(pending)
+
+
+def _compressed_opener(path: str | Path) -> Callable | None:
+    """Return a function to open a compressed file, or None if it is not compressed.
+
+    Compression is detected from the magic bytes of the file, rather than its suffix.
+    """
+    with open(path, "rb") as f:
+        magic = f.read(max(map(len, _COMPRESSION_MAGIC)))
+    for prefix, opener in _COMPRESSION_MAGIC.items():
+        if magic.startswith(prefix):
+            return opener
+    return None
+
+
+@contextmanager
+def _open_buffer(file: str | Path | TextIO | Iterable[str]) -> Iterator:
+    """Provide the contents of a file as a buffer, memory-mapping file paths.
+
+    Compressed files cannot be mapped, and are decompressed into memory instead.
+    """
+    if (isinstance(file, str) and _is_potentially_valid_path(file)) or isinstance(
+        file, Path
+    ):
+        if (opener := _compressed_opener(file)) is not None:
+            with opener(file, "rb") as f:
+                yield f.read()
+            return
+
+        with open(file, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield ""  # Empty files cannot be mapped
+                return
+            with (
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+                memoryview(mapped) as buf,
+            ):
+                yield buf
+        return
+
+    if isinstance(file, str):
+        msg = (
+            "\nFile input was parsed as a raw CIF data block. "
+            "If you intended to read the input string as a file path, please "
+            "ensure it is validly formatted."
+        )
+        warnings.warn(msg, RuntimeWarning, stacklevel=4)
+        yield _join_lines(file.splitlines(True))
+    else:
+        yield file.read() if hasattr(file, "read") else _join_lines(file)
+
+
+def _iterparse_segments(
+    segments: Iterable[tuple], fn, cast_values: bool, strict: bool
+) -> Iterator[tuple]:
+    """Convert the units of consecutive segments into :func:`~.iterparse` events."""
+    cpat = {k: re.compile(pattern) for (k, pattern) in CifFile.PATTERNS.items()}
+
+    n_tables = 0
+    for buf, pos, endpos in segments:
+        for kind, _, *event in _scan_buffer(buf, cpat, pos, endpos):
+            if kind == "block":
+                yield ("block", *event)
+            elif kind == "pair":
+                key, val = event
+                yield (
+                    "pair",
+                    key,
+                    _try_cast_to_numeric(_strip_quotes(val))
+                    if cast_values
+                    else val.rstrip(),
+                )
+            elif kind == "loop":
+                loop_keys, start, stop = event
+                n_cols = len(loop_keys)
+                if n_cols == 0:
+                    continue  # Skip empty tables
+                if len(set(loop_keys)) < n_cols:
+                    msg = "Duplicate loop keys detected - table will not be processed."
+                    _warn_or_err(msg, strict)
+                    continue
+
+                n_tables += 1
+                yield ("loop_start", tuple(loop_keys))
+                row, n_rows = [], 0
+                for entries in _iter_table_entries(buf, start, stop, cpat):
+                    for value in entries:
+                        row.append(value)
+                        if len(row) == n_cols:
+                            yield ("row", tuple(row))
+                            row, n_rows = [], n_rows + 1
+
+                if row:
+                    msg = (
+                        f"iterparse('{fn}') : "
+                        f"Parsed data for table {n_tables} ended with a partial row "
+                        f"of {len(row)} items, which will be ignored. Expected "
+                        f"{n_cols} columns with labels: \n{loop_keys}"
+                    )
+                    _warn_or_err(msg, strict)
+                elif n_rows == 0:
+                    msg = "Loop data is empty, but n_cols > 0: check CIF file syntax."
+                    _warn_or_err(msg, strict)
+                yield ("loop_end",)
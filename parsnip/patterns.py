@@ -11,10 +11,15 @@ of string data extracted from CIF files by methods in ``parsnip.parse``.
 
 from __future__ import annotations
 
-import json
+import locale
+import math
 import re
 import sys
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+from fnmatch import translate
 from fractions import Fraction as _StdFraction
+from functools import lru_cache
 from importlib.util import find_spec as _find_spec
 from pathlib import Path
 from typing import Literal, TypeVar
@@ -54,34 +59,44 @@ def _normalize_hall(string: str | None):
     return string
 
 
-with open(Path(__file__).parent / "symops.json") as f:
-    # Process to extract the required data, in the specific format we need
-    # We move default settings to the end so that underspecific symbols like HM and IT
-    # use the standard setting where possible.
-    _items = sorted(json.load(f).items(), key=lambda kv: kv[1]["is_default_setting"])
-    _full_dict = {
-        k: v | {"symops": np.asarray(v["symops"])[:, None]} for (k, v) in _items
-    }
-    SYMOPS_BY_HALL = {_normalize_hall(k): v["symops"] for k, v in _full_dict.items()}
-    SYMOPS_BY_HM = {
-        _normalize(k): v["symops"]
-        for v in _full_dict.values()
-        for k in (
-            # All four variants are present in COD. We could force the default setting
-            # to save a bit of memory, but I'd rather have the accuracy
-            v["hermann_mauguin_full"],
-            v["hermann_mauguin_full"].split(":")[0],
-            v["hermann_mauguin_short"],
-            v["hermann_mauguin_short"].split(":")[0],
-        )
-    }
-    SYMOPS_BY_INTL = {
-        _normalize(v["table_number"]): v["symops"] for k, v in _full_dict.items()
-    }
+# Space group settings and their symmetry operations, which are memory mapped so that
+# their pages are shared between processes. Settings are ordered such that default
+# settings come last, and underspecific symbols like HM and IT resolve to them.
+# Strings are stored as ASCII bytes, and are only decoded for the settings that are
+# looked up. Each distinct operation is stored once, and referenced by index.
+_SPACEGROUPS = np.load(Path(__file__).parent / "spacegroups.npy", mmap_mode="r")
+_SETTING_SYMOPS = np.load(
+    Path(__file__).parent / "spacegroup_symops.npy", mmap_mode="r"
+)
+_SYMOP_TABLE = np.load(Path(__file__).parent / "symops.npy", mmap_mode="r")
+
+_SYMOPS_BY_COLUMN = {
+    "SYMOPS_BY_HALL": "hall",
+    # All four HM variants are present in COD. We could force the default setting to
+    # save a bit of memory, but I'd rather have the accuracy
+    "SYMOPS_BY_HM": "hm_keys",
+    "SYMOPS_BY_INTL": "table_number",
+}
+
+
+def __getattr__(name: str):
+    """Build the ``SYMOPS_BY_*`` tables of symmetry operations on first access."""
+    if name not in _SYMOPS_BY_COLUMN:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    column = _SPACEGROUPS[_SYMOPS_BY_COLUMN[name]]
+    keys = column.reshape(len(column), -1).astype(str).tolist()
+    # Later settings replace earlier ones, so ambiguous keys resolve to the default
+    table = {key: _setting_symops(i) for i, row in enumerate(keys) for key in row}
+    globals()[name] = table
+    return table
 
 
 T = TypeVar("T")
 
+_TEXT_ENCODING = locale.getpreferredencoding(False)
+"""Encoding used by :func:`open` in text mode, applied when decoding binary buffers."""
+
 ALLOWED_DELIMITERS = [";\n", "'''", '"""']
 """Delimiters allowed for nonsimple (multi-line) data entries."""
 
@@ -106,6 +121,25 @@ _WHITESPACE = "[\t ]"
 See section 3.2 of dx.doi.org/10.1107/S1600576715021871 for clarification.
 """
 
+_EOL = r"(?:\n|\Z)"
+"""Match the end of a line, or the end of the buffer."""
+
+_INDENT = r"[^\S\n]*"
+"""Match any whitespace at the start of a line, without crossing a newline."""
+
+_NONSIMPLE_DELIMITER = rf"{_INDENT}(?:;|'''|\"\"\")"
+"""Match the opening of a line that begins or ends a nonsimple data entry."""
+
+_NONSIMPLE_BLOCK = (
+    rf"(?={_NONSIMPLE_DELIMITER})[^\n]*{_EOL}"
+    rf"(?:(?!{_NONSIMPLE_DELIMITER})[^\n]*\n){_PROG_STAR}[^\n]*\n?"
+)
+"""Match a multi-line data entry, equivalent to ``_accumulate_nonsimple_data``.
+
+The block begins on a line starting with a delimiter and ends on the next such line,
+or at the end of the buffer if the block is never closed.
+"""
+
 _SAFE_STRING_RE = re.compile(r"(\(\d+\))|[^\d\[\]\,\+\-\/\*\.]")
 _SAFE_TEMPLATE_RE = re.compile(r"[^\d\[\]\,\+\-\/\*\.xyz]")
 _SAFE_FRACTN_RE = re.compile(rf"([-+]?\d{_PROG_STAR}[/.]?\d{_PROG_PLUS})")
@@ -130,6 +164,65 @@ def _contains_wildcard(s: str) -> bool:
     return "?" in s or "*" in s
 
 
+def _fold_key(key: str) -> str:
+    """Fold a data name to the form shared by its CIF and mmCIF spellings.
+
+    Data names are case-insensitive, and mmCIF separates the category of a data name
+    with a ``.`` where CIF uses an ``_`` (e.g. ``_cell.length_a`` and
+    ``_cell_length_a``).
+    """
+    return key.lower().replace(".", "_")
+
+
+def _category_prefixes(key: str) -> list[str]:
+    """Return the lowercase names of the categories a data name may belong to.
+
+    mmCIF data names separate their category with a ``.``
+    (``_atom_site.fract_x``), so they belong to exactly one category. CIF data names
+    do not mark where the category ends, so ``_atom_site_fract_x`` may belong to
+    ``_atom``, ``_atom_site``, or ``_atom_site_fract``.
+    """
+    key = key.lower()
+    if "." in key:
+        return [key.partition(".")[0]]
+    parts = key.split("_")
+    return ["_".join(parts[:i]) for i in range(2, len(parts))]
+
+
+def _build_key_index(keys: Iterable[str]) -> dict[str, list[str]]:
+    """Map the folded form of each key to the keys that share it, in input order."""
+    index = defaultdict(list)
+    for key in keys:
+        index[_fold_key(key)].append(key)
+    return dict(index)
+
+
+def _resolve_key(index: dict[str, Iterable[str]], key: str) -> list[str]:
+    """Return the keys of an index matching a key without wildcards.
+
+    Keys that only differ from ``key`` in case are returned if there are any, and
+    keys that match ``key`` in the other dialect are returned otherwise.
+    """
+    matches = index.get(_fold_key(key), ())
+    if len(matches) > 1:
+        lower = key.lower()
+        return [match for match in matches if match.lower() == lower] or [*matches]
+    return [*matches]
+
+
+@lru_cache(maxsize=1024)
+def _compile_wildcard(
+    pattern: str, ignore_case: bool = False, bracket: str = r"(\[|\])"
+) -> Callable[[str], re.Match | None]:
+    """Compile a wildcard pattern to a function that matches whole keys.
+
+    Brackets (matched by the ``bracket`` regex) are literal characters in CIF keys,
+    rather than character sets. Compiled patterns are cached across all files.
+    """
+    escaped = re.sub(bracket, r"[\1]", pattern)
+    return re.compile(translate(escaped), re.IGNORECASE if ignore_case else 0).match
+
+
 def _flatten_or_none(ls: list[T]):
     """Return the sole element from a list of l=1, None if l=0, else l."""
     return None if not ls else ls[0] if len(ls) == 1 else ls
@@ -174,6 +267,87 @@ def _snap_position(row: np.ndarray) -> tuple[str, str, str]:
     return sx, sy, sz
 
 
+_DECIMAL_RE = re.compile(r"([-+]?)(\d*)(?:\.(\d*))?")
+_RATIO_RE = re.compile(r"([-+]?\d+)/(\d+)")
+_IDEAL_TWELFTHS = np.array([int(ideal * 12) for ideal in _IDEAL_FRACS])
+"""The numerators of :data:`_IDEAL_FRACS`, over a denominator of 12."""
+
+
+def _scaled_sites(
+    frac_strs: np.ndarray, snap_fractions: bool = True
+) -> tuple[np.ndarray, int] | None:
+    """Scale Wyckoff positions to integer numerators over a common denominator.
+
+    The result is exactly equal to snapping each row with :func:`_snap_position` and
+    parsing each coordinate as a Fraction, but snapping is done with ``int64`` array
+    operations. The denominator is a multiple of 24, so that the ``y=2x`` constraint
+    of a snapped position can also be scaled.
+
+    Returns
+    -------
+        tuple[:class:`numpy.ndarray`, int] | None:
+            The :math:`(N, 3)` ``int64`` numerators and their common denominator, or
+            None if a coordinate is not a decimal number or a ratio of integers, or if
+            the positions cannot be represented exactly in ``int64``.
+    """
+    numerators, denominators, decimals = [], [], []
+    for entry in np.ravel(frac_strs):
+        clean = _NUMERIC_UNCERTAINTY_RE.sub("", str(entry)).strip()
+        if (match := _DECIMAL_RE.fullmatch(clean)) and (match[2] or match[3]):
+            sign, whole, fraction = match[1], match[2], match[3] or ""
+            numerators.append(int(sign + (whole + fraction or "0")))
+            denominators.append(10 ** len(fraction))
+            decimals.append(len(fraction))
+        elif (match := _RATIO_RE.fullmatch(clean)) and int(match[2]) != 0:
+            numerators.append(int(match[1]))
+            denominators.append(int(match[2]))
+            decimals.append(0)
+        else:
+            return None
+
+    denominator = math.lcm(24, *denominators)
+    scaled = [
+        n * (denominator // d) for n, d in zip(numerators, denominators, strict=True)
+    ]
+    if denominator > _MAX_EXACT_INTEGER or max(map(abs, scaled), default=0) >= 2**61:
+        return None
+    sites = np.array(scaled, dtype=np.int64).reshape(-1, 3)
+    if not snap_fractions:
+        return sites, denominator
+
+    # Snap decimals within 2/3 of their last digit of a twelfth that they do not equal
+    numerators = np.array(numerators, dtype=np.int64)
+    entry_denominators = np.array(denominators, dtype=np.int64)
+    remainders = np.abs(numerators) % entry_denominators
+    distances = np.abs(
+        12 * remainders[:, None] - _IDEAL_TWELFTHS * entry_denominators[:, None]
+    )
+    nearest = np.argmax(distances <= 8, axis=1)
+    snapped = (
+        (np.array(decimals) > 1)
+        & (distances <= 8).any(axis=1)
+        & (distances != 0).all(axis=1)
+    )
+    snapped_sites = np.sign(numerators) * (
+        (np.abs(numerators) - remainders) * (denominator // entry_denominators)
+        + _IDEAL_TWELFTHS[nearest] * (denominator // 12)
+    )
+    snapped = snapped.reshape(-1, 3)
+    result = np.where(snapped, snapped_sites.reshape(-1, 3), sites)
+
+    # Preserve y=2x constraints between the snapped x and y coordinates
+    x, y = sites[:, 0], sites[:, 1]
+    offset = (y - 2 * x) % denominator
+    constrained = (snapped[:, 0] | snapped[:, 1]) & (
+        100 * np.minimum(offset, denominator - offset) < denominator
+    )
+    from_x = constrained & snapped[:, 0]
+    from_y = constrained & ~snapped[:, 0]
+    result[from_x, 1] = (2 * result[from_x, 0]) % denominator
+    result[from_y, 0] = (result[from_y, 1] // 2) % denominator
+    return result, denominator
+
+
 def _rational_evaluate_array(arr: str) -> list[list[float]]:
     """Evaluate an array over the ring Q%1."""
     one = Fraction(1)
@@ -206,11 +380,13 @@ def _sympy_evaluate_array(arr: str) -> list[list[float]]:
     ]
 
 
+@lru_cache(maxsize=1024)
 def _compile_float_eval(str_input: str):
     """Pre-compile a symops template into a callable for ``python_float`` mode.
 
     Sanitizes the template string and compiles it into a ``lambda x, y, z`` that
-    can be called repeatedly with different coordinates.
+    can be called repeatedly with different coordinates. Compiled templates are
+    cached for the lifetime of the process.
     """
     safe_template = _SAFE_TEMPLATE_RE.sub("", str_input.lower())
     return eval(f"lambda x, y, z: {safe_template}", {"__builtins__": {}}, {})  # noqa: S307
@@ -275,6 +451,267 @@ def _safe_eval(
     raise ValueError(f"Unknown parse mode '{parse_mode}' was provided!")
 
 
+_SYMOP_IGNORED_RE = re.compile(r"[\s'\"]")
+_SYMOP_TERM_RE = re.compile(r"[-+]?[^-+]+")
+
+
+@lru_cache(maxsize=4096)
+def _parse_symop(
+    symop: str,
+) -> tuple[tuple[tuple[int, int, int], ...], tuple[Fraction, Fraction, Fraction]]:
+    """Parse a symmetry operation (e.g. ``'-y+1/2, x-y, z'``) to an affine operator.
+
+    Each component of the operation is a sum of signed terms, which are either a
+    coordinate with an optional integer coefficient (``-x``, ``2*y``) or a rational
+    constant (``1/2``, ``0.25``).
+
+    Returns
+    -------
+        tuple[tuple[tuple[int, int, int], ...], tuple[Fraction, Fraction, Fraction]]:
+            The :math:`(3, 3)` integer rotation matrix and the rational translation
+            vector of the operation.
+
+    Raises
+    ------
+    ValueError
+        If the operation is not a valid affine transform of ``x``, ``y``, and ``z``.
+    """
+    components = _SYMOP_IGNORED_RE.sub("", symop.lower()).split(",")
+    if len(components) != 3:
+        raise ValueError(f"Symmetry operation '{symop}' does not have 3 components.")
+
+    rotation, translation = [], []
+    for component in components:
+        terms = _SYMOP_TERM_RE.findall(component)
+        if not terms or "".join(terms) != component:
+            raise ValueError(f"Symmetry operation '{symop}' could not be parsed.")
+        row, shift = [0, 0, 0], Fraction(0)
+        for term in terms:
+            try:
+                if term[-1] in "xyz":
+                    coefficient = term[:-1].rstrip("*")
+                    coefficient = Fraction(
+                        coefficient + "1"
+                        if coefficient in {"", "+", "-"}
+                        else coefficient
+                    )
+                    if coefficient.denominator != 1:
+                        raise ValueError
+                    row["xyz".index(term[-1])] += int(coefficient)
+                else:
+                    shift += Fraction(term)
+            except (ValueError, ZeroDivisionError):
+                msg = f"Symmetry operation '{symop}' could not be parsed."
+                raise ValueError(msg) from None
+        rotation.append(tuple(row))
+        translation.append(shift)
+    return tuple(rotation), tuple(translation)
+
+
+def _symop_operators(symops: ArrayLike) -> tuple[np.ndarray, np.ndarray]:
+    """Parse an array of symmetry operations to affine operators.
+
+    Operations are canonicalized by removing whitespace and quotes, and the operators
+    of each distinct set are cached for the lifetime of the process.
+
+    Returns
+    -------
+        tuple[:class:`numpy.ndarray`, :class:`numpy.ndarray`]:
+            Read-only :math:`(N, 3, 3)` ``int64`` rotation matrices, and the
+            :math:`(N, 3)` object array of :class:`~fractions.Fraction` translations.
+    """
+    return _compile_symops(
+        tuple(
+            _SYMOP_IGNORED_RE.sub("", str(symop).lower()) for symop in np.ravel(symops)
+        )
+    )
+
+
+@lru_cache(maxsize=1024)
+def _compile_symops(symops: tuple[str, ...]) -> tuple[np.ndarray, np.ndarray]:
+    """Build the cached operators of a canonicalized set of symmetry operations."""
+    operators = [_parse_symop(symop) for symop in symops]
+    rotations = np.array([rotation for rotation, _ in operators], dtype=np.int64)
+    translations = np.empty((len(operators), 3), dtype=object)
+    translations[...] = [translation for _, translation in operators]
+    rotations = rotations.reshape(-1, 3, 3)
+    rotations.flags.writeable = translations.flags.writeable = False
+    return rotations, translations
+
+
+def _spacegroup_operations(setting: int) -> np.ndarray:
+    """Read the rows of :data:`_SYMOP_TABLE` for a space group setting."""
+    start, stop = _SPACEGROUPS[["start", "stop"]][setting].tolist()
+    return _SYMOP_TABLE[_SETTING_SYMOPS[start:stop]]
+
+
+def _setting_symops(setting: int) -> np.ndarray:
+    """Decode the symmetry operation strings of a space group setting.
+
+    Returns
+    -------
+        :math:`(N,1)` :class:`numpy.ndarray[str]`:
+            The symmetry operations, as in :attr:`~parsnip.parsnip.CifFile.symops`.
+    """
+    return _spacegroup_operations(setting)["symop"].astype(str)[:, None]
+
+
+@lru_cache(maxsize=1024)
+def _spacegroup_operators(setting: int) -> tuple[np.ndarray, np.ndarray]:
+    """Read the affine operators of a space group setting from the database.
+
+    Returns
+    -------
+        tuple[:class:`numpy.ndarray`, :class:`numpy.ndarray`]:
+            Read-only :math:`(N, 3, 3)` ``int64`` rotation matrices, and the
+            :math:`(N, 3)` object array of :class:`~fractions.Fraction` translations.
+    """
+    operations = _spacegroup_operations(setting)
+    rotations = operations["rotation"].astype(np.int64)
+    translations = np.empty((len(operations), 3), dtype=object)
+    translations.flat = [
+        Fraction(numerator, denominator)
+        for numerator, denominator in zip(
+            operations["numerator"].ravel().tolist(),
+            operations["denominator"].ravel().tolist(),
+            strict=True,
+        )
+    ]
+    rotations.flags.writeable = translations.flags.writeable = False
+    return rotations, translations
+
+
+def symop_cache_info():
+    """Report the hit and miss statistics of the symmetry operation caches.
+
+    Each distinct set of symmetry operations is parsed into affine operators (or
+    compiled into a ``lambda`` when the operations are not affine) once per process,
+    and reused by every subsequent call to
+    :meth:`~parsnip.parsnip.CifFile.build_unit_cell`. The caches are bounded and
+    thread-safe.
+
+    Example
+    -------
+    >>> from parsnip.patterns import symop_cache_info
+    >>> symop_cache_info()  # doctest: +SKIP
+    {'operators': CacheInfo(hits=41, misses=3, maxsize=1024, currsize=3), ...}
+
+    Returns
+    -------
+        dict[str, CacheInfo]:
+            The ``hits``, ``misses``, ``maxsize``, and ``currsize`` of the caches of
+            parsed ``operators``, of operators read from the ``spacegroups`` database,
+            and of ``compiled`` float evaluation templates.
+    """
+    return {
+        "operators": _compile_symops.cache_info(),
+        "spacegroups": _spacegroup_operators.cache_info(),
+        "compiled": _compile_float_eval.cache_info(),
+    }
+
+
+def _fraction_array(strings: ArrayLike) -> np.ndarray:
+    """Parse an array of decimal or fractional strings to an array of Fractions.
+
+    Standard uncertainties are ignored, and a ValueError is raised if any entry is not
+    a number.
+    """
+    fractions = np.empty(np.shape(strings), dtype=object)
+    try:
+        fractions.flat = [
+            Fraction(_NUMERIC_UNCERTAINTY_RE.sub("", str(entry)))
+            for entry in np.ravel(strings)
+        ]
+    except ZeroDivisionError as error:
+        raise ValueError(str(error)) from None
+    return fractions
+
+
+def _apply_symops(
+    rotations: np.ndarray,
+    translations: np.ndarray,
+    coords: np.ndarray,
+    parse_mode: Literal["rational", "python_float"] = "rational",
+) -> np.ndarray:
+    r"""Apply every symmetry operation to every site in a single batched contraction.
+
+    With ``parse_mode='rational'``, ``coords`` must hold :class:`~fractions.Fraction`
+    objects, and positions are computed exactly and wrapped into :math:`[0, 1)` before
+    they are converted to float. With ``parse_mode='python_float'``, ``coords`` must
+    be a float array, and positions are not wrapped.
+
+    Returns
+    -------
+        :math:`(N_{sites} \times N_{ops}, 3)` :class:`numpy.ndarray[float]`:
+            The images of each site under each operation, ordered by site.
+    """
+    if parse_mode == "python_float":
+        images = np.einsum("oij,sj->soi", rotations, coords)
+        images += translations.astype(np.float64)
+        return images.reshape(-1, 3)
+
+    denominator = math.lcm(*(fraction.denominator for fraction in coords.flat))
+    sites = [
+        fraction.numerator * (denominator // fraction.denominator)
+        for fraction in coords.flat
+    ]
+    return _apply_scaled_symops(
+        rotations, translations, np.array(sites, dtype=object), denominator
+    ).reshape(-1, 3)
+
+
+def _apply_scaled_symops(
+    rotations: np.ndarray,
+    translations: np.ndarray,
+    sites: np.ndarray,
+    denominator: int,
+) -> np.ndarray:
+    r"""Apply symmetry operations exactly to sites scaled by a common denominator.
+
+    The sites and translations are scaled to integers over a shared denominator, and
+    their images are computed and wrapped into :math:`[0, 1)` in ``int64`` arithmetic.
+    Fractions are used instead if the denominator or the images are too large.
+
+    Parameters
+    ----------
+        rotations : :math:`(N_{ops}, 3, 3)` :class:`numpy.ndarray[int]`
+            The rotation matrix of each operation.
+        translations : :math:`(N_{ops}, 3)` :class:`numpy.ndarray[Fraction]`
+            The translation of each operation.
+        sites : :math:`(N_{sites}, 3)` :class:`numpy.ndarray[int]`
+            The numerators of the coordinates of each site.
+        denominator : int
+            The denominator of every coordinate of ``sites``.
+
+    Returns
+    -------
+        :math:`(N_{sites} \times N_{ops}, 3)` :class:`numpy.ndarray[float]`:
+            The images of each site under each operation, ordered by site.
+    """
+    common = math.lcm(denominator, *(shift.denominator for shift in translations.flat))
+    scale = common // denominator
+    shifts = [
+        shift.numerator * (common // shift.denominator) for shift in translations.flat
+    ]
+    largest_site = max((abs(int(site)) for site in np.ravel(sites)), default=0) * scale
+    largest_image = int(
+        np.abs(rotations).sum(axis=2).max(initial=0)
+    ) * largest_site + max(map(abs, shifts), default=0)
+
+    if common > _MAX_EXACT_INTEGER or largest_image >= 2**63:
+        coords = np.empty(np.shape(sites), dtype=object)
+        coords.flat = [Fraction(int(site), denominator) for site in np.ravel(sites)]
+        images = np.einsum("oij,sj->soi", rotations.astype(object), coords)
+        images = (images + translations) % 1
+        return images.reshape(-1, 3).astype(np.float64)
+
+    sites = np.asarray(sites, dtype=np.int64).reshape(-1, 3) * scale
+    shifts = np.array(shifts, dtype=np.int64).reshape(translations.shape)
+    images = np.einsum("oij,sj->soi", rotations, sites) + shifts
+    # Both operands are below 2**53, so the division is exact up to rounding
+    return ((images % common) / common).reshape(-1, 3)
+
+
 def _write_debug_output(unique_indices, unique_counts, pos, check="Initial"):
     print(f"{check} uniqueness check:")
     if len(unique_indices) == len(pos):
@@ -314,11 +751,286 @@ def cast_array_to_float(
         return np.array("nan", dtype=dtype)
     if np.array(arr).shape == (0,):
         return np.array((), dtype=dtype)
-    arr = [(el if el is not None else "nan") for el in arr]
-    stripped = np.char.partition(arr, "(")[..., 0]
+    return parse_numeric(arr, dtype, handle_fractions=handle_fractions)[0]
+
+
+_POWERS_OF_TEN = np.array([float(10**i) for i in range(23)])
+"""Powers of ten that are exactly representable as double precision floats."""
+_MIN_VECTORIZED_SIZE = 64
+"""Smallest number of entries that :func:`parse_numeric` parses column by column."""
+_MAX_EXACT_VALUE = 10**15
+"""Integers below this value are exactly representable as double precision floats."""
+_MAX_EXACT_INTEGER = 2**53
+"""Every integer up to this value is exactly representable as a float64."""
+
+
+def parse_numeric(
+    arr: ArrayLike, dtype: type = np.float64, *, handle_fractions: bool = False
+) -> tuple[np.ndarray, np.ndarray]:
+    """Parse an array of CIF numbers into values and standard uncertainties.
+
+    Numbers are parsed directly from the code points of the array: the digits of each
+    entry are accumulated into an exact integer, which is then scaled by a single
+    power of ten. This is correctly rounded whenever the digits and scale are exactly
+    representable (up to 15 significant digits and scales up to :math:`10^{22}`),
+    which covers nearly all CIF data. All other entries, such as ``"nan"`` or numbers
+    with more digits, are parsed individually. Uncertainties are scaled to the last
+    digit of their value, so ``"1.23e4(5)"`` has an uncertainty of ``500.0``.
+
+    Example
+    -------
+    >>> parse_numeric(["1.234(5)", "-0.5", "1/3"], handle_fractions=True)
+    (array([ 1.234     , -0.5       ,  0.33333333]), array([0.005,   nan,   nan]))
+
+    Args:
+        arr (np.array[str]): Array of numbers to parse. ``None`` entries are parsed as
+            ``nan``.
+        dtype (type, optional):
+            Floating point dtype of the parsed values.
+            Default value = ``np.float64``
+        handle_fractions (bool, optional):
+            When ``True``, also parse fractions (e.g. ``"1/3"``), as with
+            ``Fraction``. Default value = ``False``
+
+    Returns
+    -------
+        tuple[np.array[dtype], np.array[float]]: The parsed values and their standard
+        uncertainties, with ``nan`` where no uncertainty was given.
+
+    Raises
+    ------
+    ValueError
+        If an entry is not a valid number.
+    """
+    strings = np.asarray(arr)
+    if strings.dtype.kind in "iuf":
+        return strings.astype(dtype), np.full(strings.shape, np.nan)
+    if strings.dtype.kind not in "US":
+        strings = np.where(np.equal(strings, None), "nan", strings).astype(str)
+    if np.dtype(dtype).kind != "f":
+        return _parse_numeric_strings(strings, dtype, handle_fractions)
+
+    flat = np.ascontiguousarray(strings).ravel()
+    if flat.size == 0 or flat.itemsize == 0:
+        return _parse_numeric_strings(strings, dtype, handle_fractions)
+    if flat.size < _MIN_VECTORIZED_SIZE:
+        # Parsing column by column costs more than parsing a few strings directly
+        parsed = np.array(
+            [
+                _parse_numeric_scalar(
+                    s if isinstance(s, str) else s.decode(), handle_fractions
+                )
+                for s in flat.tolist()
+            ],
+            dtype=np.float64,
+        )
+        return (
+            parsed[:, 0].astype(dtype).reshape(strings.shape),
+            parsed[:, 1].reshape(strings.shape),
+        )
+    codes = flat.view("<u4" if flat.dtype.kind == "U" else "u1").reshape(len(flat), -1)
+    values, uncertainties, is_valid, is_exact = _parse_numeric_codes(
+        codes, handle_fractions
+    )
+
+    is_parsed = is_valid & is_exact
+    if not is_parsed.all():
+        values[~is_parsed] = _parse_numeric_strings(
+            flat[~is_parsed], np.float64, handle_fractions
+        )[0]
+    return (
+        values.astype(dtype).reshape(strings.shape),
+        uncertainties.reshape(strings.shape),
+    )
+
+
+def _parse_numeric_strings(
+    strings: np.ndarray, dtype: type, handle_fractions: bool
+) -> tuple[np.ndarray, np.ndarray]:
+    """Parse numbers one at a time, ignoring any standard uncertainties."""
+    stripped = np.char.partition(strings, "(" if strings.dtype.kind == "U" else b"(")
+    stripped = stripped[..., 0]
     if handle_fractions:
-        return np.vectorize(lambda s: dtype(Fraction(s)))(stripped)
-    return stripped.astype(dtype)
+        values = np.vectorize(lambda s: dtype(Fraction(s)), otypes=[dtype])(stripped)
+    else:
+        values = stripped.astype(dtype)
+    return values, np.full(strings.shape, np.nan)
+
+
+def _parse_numeric_scalar(s: str, handle_fractions: bool) -> tuple[float, float]:
+    """Parse a single number into a float and its standard uncertainty.
+
+    This gives the same results as :func:`_parse_numeric_codes` for one string, without
+    building a ``Fraction`` for numbers in the CIF grammar. Other strings are parsed as
+    in :func:`_parse_numeric_strings`.
+    """
+    value, uncertainty = _parse_numeric_value(s)
+    if not isinstance(value, str):
+        if value == 0:
+            # int("-0") has no sign, and neither has a Fraction of zero
+            value = -0.0 if s[0] == "-" and not handle_fractions else 0.0
+        return float(value), uncertainty
+    fraction = _NUMERIC_FRACTION.fullmatch(s) if handle_fractions else None
+    if fraction is not None and int(fraction[2]) > 0:
+        # Division of integers is correctly rounded, as with Fraction
+        return int(fraction[1]) / int(fraction[2]), np.nan
+    number = s.partition("(")[0]
+    return float(Fraction(number)) if handle_fractions else float(number), np.nan
+
+
+(
+    _START,
+    _SIGN,
+    _INTEGER,
+    _POINT,
+    _BARE_POINT,
+    _DECIMAL,
+    _EXPONENT_MARK,
+    _EXPONENT_SIGN,
+    _EXPONENT,
+    _OPEN,
+    _UNCERTAINTY,
+    _CLOSE,
+    _SLASH,
+    _DENOMINATOR,
+    _END,
+    _ERROR,
+) = range(16)
+_N_STATES = 16
+_N_CLASSES = 9
+_ACCEPTING = (_INTEGER, _POINT, _DECIMAL, _EXPONENT, _CLOSE, _DENOMINATOR, _END)
+
+_NUMERIC_CHARACTER_CLASSES = np.full(256, _N_CLASSES - 1, dtype=np.uint8)
+for _class, _characters in enumerate(
+    ("0123456789", ".", "eE", "+-", "(", ")", "/", "\0")
+):
+    _NUMERIC_CHARACTER_CLASSES[[ord(c) for c in _characters]] = _class
+
+
+def _numeric_transitions(handle_fractions: bool) -> np.ndarray:
+    """Build the state transition table of the CIF number grammar.
+
+    Numbers have the form ``[sign]digits[.digits][e[sign]digits][(digits)]`` or, when
+    ``handle_fractions`` is set, ``[sign]digits/digits``.
+    """
+    transitions = np.full((_N_STATES, _N_CLASSES), _ERROR, dtype=np.intp)
+    digit, dot, exp, sign, lparen, rparen, slash, end = range(8)
+    for state, character, target in (
+        (_START, digit, _INTEGER),
+        (_START, dot, _BARE_POINT),
+        (_START, sign, _SIGN),
+        (_SIGN, digit, _INTEGER),
+        (_SIGN, dot, _BARE_POINT),
+        (_INTEGER, digit, _INTEGER),
+        (_INTEGER, dot, _POINT),
+        (_BARE_POINT, digit, _DECIMAL),
+        (_POINT, digit, _DECIMAL),
+        (_DECIMAL, digit, _DECIMAL),
+        (_EXPONENT_MARK, sign, _EXPONENT_SIGN),
+        (_EXPONENT_MARK, digit, _EXPONENT),
+        (_EXPONENT_SIGN, digit, _EXPONENT),
+        (_EXPONENT, digit, _EXPONENT),
+        (_OPEN, digit, _UNCERTAINTY),
+        (_UNCERTAINTY, digit, _UNCERTAINTY),
+        (_UNCERTAINTY, rparen, _CLOSE),
+        (_SLASH, digit, _DENOMINATOR),
+        (_DENOMINATOR, digit, _DENOMINATOR),
+        (_END, end, _END),
+    ):
+        transitions[state, character] = target
+    for state in (_INTEGER, _POINT, _DECIMAL):
+        transitions[state, exp] = _EXPONENT_MARK
+    for state in (_INTEGER, _POINT, _DECIMAL, _EXPONENT):
+        transitions[state, lparen] = _OPEN
+    for state in _ACCEPTING:
+        transitions[state, end] = _END
+    if handle_fractions:
+        transitions[_INTEGER, slash] = _SLASH
+    return transitions.ravel()
+
+
+_NUMERIC_TRANSITIONS = {
+    handle_fractions: _numeric_transitions(handle_fractions)
+    for handle_fractions in (False, True)
+}
+
+
+def _parse_numeric_codes(
+    codes: np.ndarray, handle_fractions: bool
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Parse numbers from an :math:`(N, W)` array of code points, column by column.
+
+    Each column advances the state of every entry through the number grammar and
+    accumulates its digits into exact integers. Returns the values, the uncertainties,
+    a mask of the entries that match the grammar, and a mask of the valid entries whose
+    values are exact. Values outside both masks must be parsed separately.
+    """
+    n_rows = len(codes)
+    transitions = _NUMERIC_TRANSITIONS[handle_fractions]
+    state = np.full(n_rows, _START, dtype=np.intp)
+    is_negative = codes[:, 0] == ord("-")
+    is_negative_exponent = np.zeros(n_rows, dtype=bool)
+    decimals = np.zeros(n_rows, dtype=np.int16)
+    numbers = {
+        target: np.zeros(n_rows, dtype=np.int64)
+        for target in (_INTEGER, _EXPONENT, _UNCERTAINTY, _DENOMINATOR)
+    }
+
+    # Non-ASCII code points are all mapped to 255, which is not part of any number
+    codes = np.minimum(codes, 255).astype(np.uint8).T
+    classes = np.ascontiguousarray(_NUMERIC_CHARACTER_CLASSES[codes])
+    digits = np.ascontiguousarray(codes - np.uint8(ord("0")))
+    # Up to 18 digits in total always fit in the int64 accumulators
+    fits = (classes == 0).sum(axis=0, dtype=np.int16) <= 18
+    for column, character_class, digit in zip(codes, classes, digits, strict=True):
+        state = transitions[state * _N_CLASSES + character_class]
+        is_exponent_sign = state == _EXPONENT_SIGN
+        if is_exponent_sign.any():
+            is_negative_exponent |= is_exponent_sign & (column == ord("-"))
+
+        is_decimal = state == _DECIMAL
+        decimals += is_decimal
+        for target, value in numbers.items():
+            is_target = (
+                is_decimal | (state == _INTEGER)
+                if target == _INTEGER
+                else (state == target)
+            )
+            if is_target.any():
+                np.copyto(value, value * 10 + digit, where=is_target)
+
+    mantissa, exponent, uncertainty, denominator = numbers.values()
+    scale = np.where(is_negative_exponent, -exponent, exponent) - decimals
+    has_uncertainty = (classes == _NUMERIC_CHARACTER_CLASSES[ord("(")]).any(axis=0)
+    is_fraction = (classes == _NUMERIC_CHARACTER_CLASSES[ord("/")]).any(axis=0)
+    is_valid = np.isin(state, _ACCEPTING) & (~is_fraction | (denominator > 0))
+    is_exact = (
+        fits
+        & (
+            np.maximum(np.maximum(mantissa, uncertainty), denominator)
+            < _MAX_EXACT_VALUE
+        )
+        & (np.abs(scale) < len(_POWERS_OF_TEN))
+    )
+    power = _POWERS_OF_TEN[np.minimum(np.abs(scale), len(_POWERS_OF_TEN) - 1)]
+    is_scaled_down = scale < 0
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        magnitude = np.where(is_scaled_down, mantissa / power, mantissa * power)
+        if is_fraction.any():
+            magnitude = np.where(is_fraction, mantissa / denominator, magnitude)
+        uncertainties = np.where(
+            is_scaled_down, uncertainty / power, uncertainty * power
+        )
+        if not is_exact.all():
+            uncertainties = np.where(
+                is_exact, uncertainties, uncertainty * 10.0 ** scale.astype(float)
+            )
+    uncertainties[~has_uncertainty | ~is_valid | ~fits] = np.nan
+    if handle_fractions:
+        # Matches Fraction, which has no negative zero
+        is_negative &= magnitude != 0
+    values = np.where(is_negative, -magnitude, magnitude)
+    return values, uncertainties, is_valid, is_exact
 
 
 def _accumulate_nonsimple_data(data_iter, line: str = ""):
@@ -336,12 +1048,27 @@ def _accumulate_nonsimple_data(data_iter, line: str = ""):
     return line
 
 
+def _join_lines(lines: Iterable[str]) -> str:
+    """Join an iterable of lines into a single buffer, ensuring each ends in newline."""
+    return "".join(line if line[-1:] == "\n" else f"{line}\n" for line in lines)
+
+
+def _decode_bytes(data: bytes | memoryview) -> str:
+    """Decode a slice of a binary buffer, translating newlines as in text mode."""
+    return str(data, _TEXT_ENCODING).replace("\r\n", "\n")
+
+
 def _is_key(line: str | None):
     return line is not None and line.strip()[:1] == "_"
 
 
 def _is_data(line: str | None):
-    return line is not None and line.strip()[:1] != "_" and line.strip()[:5] != "loop_"
+    return (
+        line is not None
+        and line.strip()[:1] != "_"
+        and line.strip()[:5] != "loop_"
+        and line.strip()[:5].lower() != "data_"
+    )
 
 
 def _strip_comments(s: str):
@@ -379,6 +1106,34 @@ def _try_cast_to_numeric(s: str):
     return int(parsed.group(0))
 
 
+_NUMERIC_VALUE = re.compile(
+    r"([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)(?:\((\d+)\))?"
+)
+
+
+_NUMERIC_FRACTION = re.compile(r"([+-]?\d+)/(\d+)")
+
+
+def _parse_numeric_value(s: str) -> tuple[str | int | float, float]:
+    """Parse a single value to a number and its standard uncertainty, if possible.
+
+    Returns the original string and ``nan`` if the value is not a number. As in
+    :func:`parse_numeric`, uncertainties are scaled to the last digit of their value.
+    """
+    match = _NUMERIC_VALUE.fullmatch(s)
+    if match is None:
+        return s, np.nan
+    number, digits = match.groups()
+    mantissa, _, exponent = number.lower().partition("e")
+    value = float(number) if "." in mantissa or exponent else int(number)
+    if digits is None:
+        return value, np.nan
+    scale = int(exponent or 0) - len(mantissa.partition(".")[2])
+    return value, (
+        int(digits) * 10.0**scale if scale >= 0 else int(digits) / 10.0**-scale
+    )
+
+
 def _matrix_from_lengths_and_angles(l1, l2, l3, alpha, beta, gamma):
     a1 = np.array([l1, 0, 0])
     a2 = np.array([l2 * np.cos(gamma), l2 * np.sin(gamma), 0])
@@ -413,8 +1168,22 @@ def _box_from_lengths_and_angles(l1, l2, l3, alpha, beta, gamma):
     return tuple(float(x) for x in [lx, ly, lz, xy, xz, yz])
 
 
-def _lookup_symops(cif) -> np.ndarray | None:
-    """Look up the symmetry operations for a space group.
+def _find_setting(column: str, key: str) -> int | None:
+    """Find the last setting with a matching entry in a column of the database.
+
+    Default settings come last, so they are preferred when a key is ambiguous.
+    """
+    try:
+        key = key.encode("ascii")
+    except UnicodeEncodeError:
+        return None  # The database is ASCII, so this cannot match
+    entries = _SPACEGROUPS[column]
+    matches = np.flatnonzero((entries == key).reshape(len(entries), -1).any(axis=1))
+    return int(matches[-1]) if len(matches) else None
+
+
+def _lookup_spacegroup(cif) -> int | None:
+    """Look up the index of a space group setting in the database.
 
     Note that we choose the default setting (as listed in the International Tables) if
     the provided lookup is ambiguous.
@@ -426,17 +1195,26 @@ def _lookup_symops(cif) -> np.ndarray | None:
     - _space_group_IT_number         # Ambiguous setting
     - _symmetry_Int_Tables_number    # Deprecated, ambiguous setting
     """
-    symops = None
+    setting = None
     if (hall := cif["_space_group_name_Hall"]) is not None:
-        symops = SYMOPS_BY_HALL.get(_normalize_hall(hall))
+        setting = _find_setting("hall", _normalize_hall(hall))
 
-    if symops is None and (
+    if setting is None and (
         hm := cif["_space_group_name_H-M_alt"] or cif["_symmetry_space_group_name_H-M"]
     ):
-        symops = SYMOPS_BY_HM.get(_normalize(hm))
+        setting = _find_setting("hm_keys", _normalize(hm))
 
-    if symops is None and (
+    if setting is None and (
         it := cif["_space_group_IT_number"] or cif["_symmetry_Int_Tables_number"]
     ):
-        symops = SYMOPS_BY_INTL.get(_normalize(it))
-    return symops
+        setting = _find_setting("table_number", _normalize(it))
+    return setting
+
+
+def _lookup_symops(cif) -> np.ndarray | None:
+    """Look up the symmetry operations for a space group.
+
+    See :func:`_lookup_spacegroup` for the keys used to identify the space group.
+    """
+    setting = _lookup_spacegroup(cif)
+    return _setting_symops(setting) if setting is not None else None
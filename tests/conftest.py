@@ -5,6 +5,7 @@ import re
 import warnings
 from dataclasses import dataclass
 from glob import glob
+from pathlib import Path
 
 import numpy as np
 import pytest
@@ -295,3 +296,13 @@ additional_files_mark = pytest.mark.parametrize(
 )
 
 all_files_mark = combine_marks(cif_files_mark, additional_files_mark)
+
+# Used for test_blocks
+multiblock_files = [cif_data.filename for cif_data in cif_data_array[:4]]
+
+
+@pytest.fixture
+def multiblock(tmp_path):
+    path = tmp_path / "multiblock.cif"
+    path.write_text("".join(Path(fn).read_text() + "\n" for fn in multiblock_files))
+    return path
@@ -0,0 +1,98 @@
+import gzip
+
+import numpy as np
+import pytest
+from conftest import multiblock_files
+
+import parsnip.parsnip
+from parsnip import CifFile, build_index, iter_blocks, iterparse
+
+pytestmark = pytest.mark.filterwarnings(
+    "ignore:Duplicate key:parsnip._errors.ParseWarning"
+)
+
+
+def test_iter_blocks(multiblock):
+    blocks = [*iter_blocks(multiblock)]
+    assert len(blocks) == len(multiblock_files)
+    for block, fn in zip(blocks, multiblock_files, strict=True):
+        cif = CifFile(fn)
+        assert block.block_name == cif.block_name
+        assert block.pairs == cif.pairs
+        assert block.loop_labels == cif.loop_labels
+
+    # The flattened file only keeps the first block's name
+    assert CifFile(multiblock).block_name == blocks[0].block_name
+
+
+def test_iter_blocks_text_fields():
+    lines = [
+        "# A comment before the first block\n",
+        "data_first\n",
+        "_text\n",
+        ";\n",
+        "data_this_is_not_a_block\n",
+        ";\n",
+        "  DATA_second\n",
+        "_key value\n",
+    ]
+    blocks = [*iter_blocks(lines)]
+    assert [block.block_name for block in blocks] == ["first", "second"]
+    assert blocks[0].pairs == {"_text": ";\ndata_this_is_not_a_block\n;"}
+    assert blocks[1].pairs == {"_key": "value"}
+
+    assert [block.pairs for block in iter_blocks(lines[2:6])] == [blocks[0].pairs]
+    assert [*iter_blocks([])] == []
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_iter_blocks_compressed(multiblock, monkeypatch, chunk_size):
+    monkeypatch.setattr(parsnip.parsnip, "_DECOMPRESSED_CHUNK_SIZE", chunk_size)
+    text = "# Preamble\ndata_first\n_text\n;\ndata_not_a_block\n;\n"
+    multiblock.write_text(text + multiblock.read_text())
+    compressed = multiblock.with_name("multiblock.cif.gz")
+    compressed.write_bytes(gzip.compress(multiblock.read_bytes()))
+
+    expected = [*iter_blocks(multiblock)]
+    blocks = [*iter_blocks(compressed)]
+    assert [block.block_name for block in blocks] == [
+        block.block_name for block in expected
+    ]
+    assert [block.pairs for block in blocks] == [block.pairs for block in expected]
+    assert [*iterparse(compressed)] == [*iterparse(multiblock)]
+
+
+def test_open_indexed_blocks(multiblock):
+    index_path = build_index(multiblock)
+    assert index_path == multiblock.with_name("multiblock.cif.pidx")
+
+    for i, expected in enumerate(iter_blocks(multiblock)):
+        for block in (i, expected.block_name):
+            cif = CifFile.open_indexed(multiblock, block)
+            assert cif.block_name == expected.block_name
+            assert cif.pairs == expected.pairs
+            assert cif.loop_labels == expected.loop_labels
+            for table, expected_table in zip(cif.loops, expected.loops, strict=True):
+                np.testing.assert_array_equal(table, expected_table)
+
+    with pytest.raises(KeyError, match="not_a_block"):
+        CifFile.open_indexed(multiblock, "not_a_block")
+
+
+def test_open_indexed_keys(multiblock):
+    expected = [*iter_blocks(multiblock)][1]
+    keys = [*list(expected.pairs)[:3], f"{expected.loop_labels[-1][0]}*"]
+
+    cif = CifFile.open_indexed(multiblock, 1, keys=keys)
+    assert cif.pairs == {key: expected.pairs[key] for key in keys[:3]}
+    assert cif.loop_labels == [expected.loop_labels[-1]]
+
+
+def test_open_indexed_rebuilds(multiblock):
+    CifFile.open_indexed(multiblock)  # Builds the index if it does not exist
+    index_path = multiblock.with_name("multiblock.cif.pidx")
+    assert index_path.exists()
+
+    multiblock.write_text("data_replaced\n_key value\n")
+    cif = CifFile.open_indexed(multiblock, "replaced")
+    assert cif.pairs == {"_key": "value"}
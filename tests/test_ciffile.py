@@ -1,12 +1,16 @@
+import importlib
 import re
 from pathlib import Path
 
 import numpy as np
 import pytest
-from conftest import _array_assertion_verbose, cif_files_mark
+from conftest import _array_assertion_verbose, bad_cif, cif_files_mark, pdb_4INS
 
-from parsnip import CifFile
+import parsnip.parsnip
+from parsnip import CifFile, iterparse
 from parsnip._errors import ParseWarning
+from parsnip.parsnip import _scan_buffer
+from parsnip.patterns import _strip_quotes, _try_cast_to_numeric
 
 
 @cif_files_mark
@@ -31,6 +35,118 @@ def test_cast_values(cif_data):
     assert cif_data.file.pairs == uncast_pairs
 
 
+@cif_files_mark
+def test_typed_pairs(cif_data):
+    pairs = dict(cif_data.file.pairs)
+    typed = cif_data.file.typed_pairs
+    assert typed._cache == {}  # Nothing is parsed until it is read
+    assert typed.keys() == pairs.keys()
+
+    for key, value in typed.items():
+        cast = _try_cast_to_numeric(_strip_quotes(pairs[key]))
+        if isinstance(cast, (int, float)) and not isinstance(value, str):
+            assert value == pytest.approx(cast)
+        elif isinstance(value, str):
+            assert value == pairs[key].replace("'", "").replace('"', "").strip()
+        assert type(value) in {str, int, float}
+    assert cif_data.file.pairs == pairs
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_derived_data_cache(tmp_path, lazy):
+    fn = tmp_path / "cached.cif"
+    fn.write_text(
+        "data_x\n_cell_length_a 3.6\n_cell_length_b 3.6\n_cell_length_c 3.6\n"
+        "_cell_angle_alpha 90\n_cell_angle_beta 90\n_cell_angle_gamma 90\n"
+        "loop_\n_atom_site_label\n_atom_site_fract_x\n_atom_site_fract_y\n"
+        "_atom_site_fract_z\nCu1 0.0 0.0 0.0\nloop_\n_symmetry_equiv_pos_as_xyz\n"
+        "x,y,z\nz,y+1/2,x+1/2\n"
+    )
+    cif = CifFile(fn, lazy=lazy)
+    uncached = CifFile(fn, lazy=lazy)
+
+    def derived(cif):
+        return [
+            cif.read_cell_params(),
+            cif.read_cell_params(degrees=False),
+            cif.box,
+            cif.lattice_vectors,
+            cif.loop_labels,
+            cif.symops,
+            cif.wyckoff_positions,
+            cif.build_unit_cell(),
+            *cif.build_unit_cell(additional_columns=["_atom_site_label"]),
+        ]
+
+    # Building deferred tables clears the cache once, as the tables are replaced
+    first = derived(cif)
+    np.testing.assert_equal(derived(cif), first)
+    assert len(cif._cache) == 9
+
+    # Cached arrays and lists are copied, so modifying them leaves the cache intact
+    cif.lattice_vectors[0, 0] = 0.0
+    cif.loop_labels.clear()
+    assert cif.lattice_vectors[0, 0] == 3.6
+    assert len(cif.loop_labels) == 2
+
+    # Modifying pairs or replacing tables clears the cache
+    cif.pairs["_cell_length_a"] = "4.0"
+    uncached.pairs["_cell_length_a"] = "4.0"
+    assert cif.box[0] == 4.0
+    cif.loops[1] = cif.loops[1][:1]
+    np.testing.assert_array_equal(cif.symops, [["x,y,z"]])
+    np.testing.assert_array_equal(cif.build_unit_cell(), [[0.0, 0.0, 0.0]])
+
+    # Tables modified in place require the cache to be cleared
+    np.testing.assert_array_equal(cif.wyckoff_positions, [[0.0, 0.0, 0.0]])
+    cif.loops[0]["_atom_site_fract_x"] = "0.5"
+    np.testing.assert_array_equal(cif.wyckoff_positions, [[0.0, 0.0, 0.0]])
+    cif.clear_cache()
+    assert cif._cache == {}
+    np.testing.assert_array_equal(cif.wyckoff_positions, [[0.5, 0.0, 0.0]])
+
+    uncached.loops[1] = uncached.loops[1][:1]
+    uncached.loops[0]["_atom_site_fract_x"] = "0.5"
+    np.testing.assert_equal(derived(cif), derived(uncached))
+
+    # Tables removed and added are detected, even if the new table reuses an id
+    dtype = cif.loops[1].dtype
+    del cif.loops[1]
+    cif.loops.append(np.array([[("-x,-y,-z",)]], dtype=dtype))
+    np.testing.assert_array_equal(cif.symops, [["-x,-y,-z"]])
+
+
+def test_typed_pairs_uncertainties(tmp_path):
+    fn = tmp_path / "pairs.cif"
+    fn.write_text(
+        "data_x\n_a 1.234(5)\n_b -3\n_c 12.3e4(12)\n_d 'Fm-3m'\n_e ?\n_f '7'\n"
+    )
+    cif = CifFile(fn)
+    typed = cif.typed_pairs
+    assert dict(typed) == {
+        "_a": 1.234,
+        "_b": -3,
+        "_c": 123000.0,
+        "_d": "Fm-3m",
+        "_e": "?",
+        "_f": 7,
+    }
+    assert typed.uncertainty("_a") == pytest.approx(0.005)
+    assert typed.uncertainty("_c") == pytest.approx(12000.0)
+    assert np.isnan(typed.uncertainty("_b"))
+    assert np.isnan(typed.uncertainty("_d"))
+    assert cif.pairs["_a"] == "1.234(5)"
+
+    # The view follows changes to the raw pairs
+    cif.pairs["_b"] = "4.5(6)"
+    assert typed["_b"] == 4.5
+    assert typed.uncertainty("_b") == pytest.approx(0.6)
+    cif.cast_values = True
+    assert cif.typed_pairs["_a"] == 1.234
+    with pytest.raises(KeyError):
+        typed["_missing"]
+
+
 def _read(fn, lines=True):
     with open(fn) as f:
         return f.readlines() if lines else f.read()
@@ -92,3 +208,194 @@ def test_semicolon_text_values(value):
     with pytest.warns(RuntimeWarning, match="parsed as a raw CIF data block"):
         cif = CifFile(cif_content)
     assert cif["_some_key"] == value.rstrip("\n")
+
+
+def _assert_equivalent(cif, other):
+    assert cif.pairs == other.pairs
+    assert len(cif.loops) == len(other.loops)
+    for table, other_table in zip(cif.loops, other.loops, strict=True):
+        assert table.dtype == other_table.dtype
+        np.testing.assert_array_equal(table, other_table)
+
+
+@cif_files_mark
+@pytest.mark.parametrize("cast_values", [False, True])
+@pytest.mark.filterwarnings("ignore:Duplicate key:parsnip._errors.ParseWarning")
+def test_parse_engines_match(cif_data, cast_values):
+    buffered = CifFile(cif_data.filename, cast_values=cast_values, engine="buffer")
+    by_line = CifFile(cif_data.filename, cast_values=cast_values, engine="line")
+    _assert_equivalent(buffered, by_line)
+
+
+def test_parse_engines_match_badcif():
+    with pytest.warns(ParseWarning) as buffer_warnings:
+        buffered = CifFile(bad_cif.filename, engine="buffer")
+    with pytest.warns(ParseWarning) as line_warnings:
+        by_line = CifFile(bad_cif.filename, engine="line")
+    _assert_equivalent(buffered, by_line)
+    assert [str(w.message) for w in buffer_warnings] == [
+        str(w.message) for w in line_warnings
+    ]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        "C1 0.1 0.25\nO22 -0.125 0.5\n",
+        "C1\t0.1  0.25 # first atom\n  O22 -0.125\n 0.5\n# trailing comment\n",
+        "C1 0.1 'a b'\nO22 -0.125 ;x\n",
+        "C1 0.1 0.25\nO2\xe9 -0.125 0.5\n",
+    ],
+    ids=["simple", "comments_and_tabs", "quoted", "non_ascii"],
+)
+def test_simple_table_bodies(body, tmp_path):
+    path = tmp_path / "table.cif"
+    path.write_text(f"data_test\nloop_\n_atom_site_label\n_x\n_y\n{body}")
+    by_line = CifFile(path, engine="line")
+    _assert_equivalent(CifFile(path), by_line)
+    assert by_line.loops[0].shape == (2, 1)
+
+
+def test_invalid_engine():
+    with pytest.raises(ValueError, match="Engine 'asdf'"):
+        CifFile(bad_cif.filename, engine="asdf")
+
+
+@cif_files_mark
+@pytest.mark.filterwarnings("ignore:Duplicate key:parsnip._errors.ParseWarning")
+def test_mmap_matches_buffer(cif_data):
+    _assert_equivalent(
+        CifFile(cif_data.filename, mmap=True), CifFile(cif_data.filename, mmap=False)
+    )
+
+
+def test_mmap_crlf(tmp_path):
+    path = tmp_path / "crlf.cif"
+    path.write_bytes(Path(bad_cif.filename).read_bytes().replace(b"\n", b"\r\n"))
+    with pytest.warns(ParseWarning):
+        mapped = CifFile(path, mmap=True)
+    with pytest.warns(ParseWarning):
+        unmapped = CifFile(path, mmap=False)
+    _assert_equivalent(mapped, unmapped)
+
+
+def test_mmap_threshold(monkeypatch):
+    mapped = []
+    monkeypatch.setattr(CifFile, "_MMAP_THRESHOLD", 0)
+    monkeypatch.setattr(CifFile, "_parse_mapped", lambda self, f: mapped.append(f))
+    CifFile(bad_cif.filename)
+    assert mapped == [bad_cif.filename]
+
+
+@pytest.mark.parametrize(
+    ("file", "engine"),
+    [
+        (bad_cif.filename, "line"),
+        (Path(bad_cif.filename).read_text(), "buffer"),
+    ],
+)
+def test_invalid_mmap(file, engine):
+    with pytest.raises(ValueError, match="Memory mapping requires"):
+        CifFile(file, engine=engine, mmap=True)
+
+
+@cif_files_mark
+@pytest.mark.parametrize("mmap", [False, True])
+@pytest.mark.filterwarnings("ignore:Duplicate key:parsnip._errors.ParseWarning")
+def test_lazy_matches_eager(cif_data, mmap):
+    lazy = CifFile(cif_data.filename, mmap=mmap, lazy=True)
+    assert lazy.pairs == CifFile(cif_data.filename).pairs
+
+    # Only tables with matching labels are built by a query, and none by repr
+    n_deferred = sum(isinstance(table, tuple) for table in lazy._loops)
+    assert f"{len(lazy._loops)} data loops" in repr(lazy)
+    assert sum(isinstance(table, tuple) for table in lazy._loops) == n_deferred
+    if lazy.get_from_loops("_symmetry_equiv_pos_as_xyz") is not None:
+        assert sum(isinstance(table, tuple) for table in lazy._loops) < n_deferred
+
+    _assert_equivalent(lazy, CifFile(cif_data.filename))
+    assert lazy._mapped is None
+
+
+def test_lazy_badcif_warns_on_access():
+    with pytest.warns(ParseWarning) as eager_warnings:
+        eager = CifFile(bad_cif.filename)
+    with pytest.warns(ParseWarning, match="Duplicate key") as lazy_warnings:
+        lazy = CifFile(bad_cif.filename, lazy=True)
+    with pytest.warns(ParseWarning) as loop_warnings:
+        _assert_equivalent(lazy, eager)
+    assert [str(w.message) for w in [*lazy_warnings, *loop_warnings]] == [
+        str(w.message) for w in eager_warnings
+    ]
+
+
+def test_invalid_lazy():
+    with pytest.raises(ValueError, match="Lazy parsing requires"):
+        CifFile(bad_cif.filename, engine="line", lazy=True)
+
+
+@cif_files_mark
+@pytest.mark.parametrize("wildcard", [False, True])
+@pytest.mark.filterwarnings("ignore:Duplicate key:parsnip._errors.ParseWarning")
+def test_projected_keys(cif_data, wildcard):
+    keys = [*cif_data.file._cell_keys, *cif_data.atom_site_keys]
+    if wildcard:
+        keys.append("_symmetry_equiv_pos*")
+    projected = CifFile(cif_data.filename, keys=keys)
+
+    for key in keys:
+        expected = cif_data.file[key]
+        if isinstance(expected, np.ndarray):
+            np.testing.assert_array_equal(projected[key], expected)
+        else:
+            assert projected[key] == expected
+    assert set(projected.pairs) <= set(cif_data.file.pairs)
+    assert len(projected.loops) <= len(cif_data.file.loops)
+
+
+def test_projected_keys_early_exit():
+    projected = CifFile(bad_cif.filename, keys="_cell_length_a")
+    assert projected.pairs == {"_cell_length_a": bad_cif.file.pairs["_cell_length_a"]}
+    assert projected.loops == []
+
+    with pytest.raises(ValueError, match="subset of keys requires"):
+        CifFile(bad_cif.filename, engine="line", keys=["_cell_length_a"])
+
+
+@pytest.mark.parametrize("key", ["_cell_length_a", "_CELL_LENGTH_A"])
+def test_projected_keys_early_exit_aliases(key, monkeypatch):
+    scanned = []
+
+    def scan(buf, cpat):
+        for unit in _scan_buffer(buf, cpat):
+            scanned.append(unit)
+            yield unit
+
+    monkeypatch.setattr(parsnip.parsnip, "_scan_buffer", scan)
+    CifFile(pdb_4INS.filename, keys="_cell.length_a")
+    n_exact, scanned[:] = len(scanned), []
+
+    # Keys matched through their other spelling end the scan at the same unit
+    projected = CifFile(pdb_4INS.filename, keys=key)
+    assert projected.pairs == {"_cell.length_a": pdb_4INS.file["_cell.length_a"]}
+    assert len(scanned) == n_exact
+    text = Path(pdb_4INS.filename).read_text()
+    assert n_exact < len([*_scan_buffer(text, projected._cpat)])
+
+
+@cif_files_mark
+@pytest.mark.parametrize("compression", ["gzip", "bz2", "lzma"])
+@pytest.mark.parametrize("engine", ["buffer", "line"])
+@pytest.mark.filterwarnings("ignore:Duplicate key:parsnip._errors.ParseWarning")
+def test_compressed_files(cif_data, compression, engine, tmp_path):
+    module = importlib.import_module(compression)
+    path = tmp_path / f"{Path(cif_data.filename).name}.{compression}"
+    path.write_bytes(module.compress(Path(cif_data.filename).read_bytes()))
+
+    _assert_equivalent(
+        CifFile(path, engine=engine), CifFile(cif_data.filename, engine=engine)
+    )
+    assert [*iterparse(path)] == [*iterparse(cif_data.filename)]
+
+    with pytest.raises(ValueError, match="uncompressed file path"):
+        CifFile(path, mmap=True)
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import pytest
+from conftest import bad_cif, cif_files_mark
+
+from parsnip import CifFile, iterparse
+from parsnip._errors import ParseWarning
+
+
+def _collect(events):
+    """Rebuild the first value of each pair, and the rows of each table."""
+    pairs, loops = {}, []
+    for event in events:
+        if event[0] == "pair":
+            pairs.setdefault(event[1], event[2])
+        elif event[0] == "loop_start":
+            loops.append((event[1], []))
+        elif event[0] == "row":
+            loops[-1][1].append(event[1])
+    return pairs, loops
+
+
+@cif_files_mark
+@pytest.mark.parametrize("cast_values", [False, True])
+@pytest.mark.filterwarnings("ignore:Duplicate key:parsnip._errors.ParseWarning")
+def test_iterparse_matches_ciffile(cif_data, cast_values):
+    cif = CifFile(cif_data.filename, cast_values=cast_values)
+    pairs, loops = _collect(iterparse(cif_data.filename, cast_values=cast_values))
+
+    assert pairs == cif.pairs
+    assert loops == [
+        (table.dtype.names, [tuple(row[0]) for row in table]) for table in cif.loops
+    ]
+
+
+@cif_files_mark
+def test_iterparse_inputs(cif_data):
+    expected = [*iterparse(cif_data.filename)]
+    with open(cif_data.filename) as file:
+        assert [*iterparse(file)] == expected
+    with open(cif_data.filename) as file:
+        assert [*iterparse(file.readlines())] == expected
+
+
+def test_iterparse_events():
+    example_file = Path(__file__).parents[1] / "doc" / "source" / "example_file.cif"
+    events = [*iterparse(example_file)]
+    assert events[0] == ("block", "cif_file")
+    assert [event[0] for event in events].count("loop_start") == 2
+    assert events[-6:] == [
+        ("loop_start", ("_symmetry_equiv_pos_site_id", "_symmetry_equiv_pos_as_xyz")),
+        ("row", ("1", "x,y,z")),
+        ("row", ("96", "z,y+1/2,x+1/2")),
+        ("row", ("118", "z+1/2,-y,x+1/2")),
+        ("row", ("192", "z+1/2,y+1/2,x")),
+        ("loop_end",),
+    ]
+
+
+def test_iterparse_badcif():
+    with pytest.warns(ParseWarning, match="partial row"):
+        events = [*iterparse(bad_cif.filename)]
+    assert events.count(("loop_end",)) == [e[0] for e in events].count("loop_start")
+
+    with pytest.raises(ValueError, match="partial row"):
+        [*iterparse(bad_cif.filename, strict=True)]
@@ -1,3 +1,5 @@
+import os
+
 import numpy as np
 import pytest
 from conftest import (
@@ -6,11 +8,14 @@ from conftest import (
     all_files_mark,
     bad_cif,
     cif_files_mark,
+    data_file_path,
     pycifrw_or_skip,
     random_keys_mark,
 )
 from more_itertools import flatten
 
+from parsnip import CifFile
+
 
 @all_files_mark
 def test_read_key_value_pairs(cif_data):
@@ -58,7 +63,9 @@ def test_wildcard_keys_pairs(cif_data, keys):
 def test_read_key_value_pairs_random(cif_data, keys):
     parsnip_data = np.asarray(cif_data.file[keys])
     _array_assertion_verbose(keys, parsnip_data, cif_data.file.get_from_pairs(keys))
-    gemmi_data = _gemmi_read_keys(cif_data.filename, keys=keys, as_number=False)
+    # Keys may match pairs written in the other dialect (_cell_length_a, _cell.length_a)
+    raw_keys = [cif_data.file._raw_keys(key)[0] for key in keys]
+    gemmi_data = _gemmi_read_keys(cif_data.filename, keys=raw_keys, as_number=False)
     _array_assertion_verbose(keys, parsnip_data, gemmi_data)
 
 
@@ -79,3 +86,123 @@ def test_read_key_value_pairs_badcif():
         None,
     ]
     _array_assertion_verbose(bad_cif.manual_keys, parsnip_data, correct_data)
+
+
+def test_dialect_aliases(tmp_path):
+    fn = tmp_path / "aliases.cif"
+    fn.write_text(
+        "data_x\n_cell.length_a 3.6\n_Cell.Angle_Alpha 90\n_exptl_crystal.F_000 12\n"
+        "_exptl_crystal_F_000 13\nloop_\n_atom_site.fract_x\n_atom_site.label\n"
+        "0.5 Cu1\n0.25 Cu2\n"
+    )
+    cif = CifFile(fn)
+
+    # Exact keys match their CIF and mmCIF spellings in any case
+    assert cif["_cell_length_a"] == cif["_CELL.LENGTH_A"] == "3.6"
+    assert cif.get_from_pairs("_cell_angle_alpha") == "90"
+    assert cif._raw_keys("_cell_length_a") == ["_cell.length_a"]
+
+    # Keys that match exactly are preferred to keys in the other dialect
+    assert cif["_exptl_crystal_F_000"] == "13"
+    assert cif["_exptl_crystal.F_000"] == "12"
+
+    np.testing.assert_array_equal(cif["_atom_site_fract_x"], [["0.5"], ["0.25"]])
+    np.testing.assert_array_equal(
+        cif.get_from_loops(["_atom_site_label", "_atom_site.fract_x"]),
+        [["Cu1", "0.5"], ["Cu2", "0.25"]],
+    )
+    assert cif["_atom_site_fract_y"] is None
+
+    # The index follows keys added to the pairs
+    cif.pairs["_cell.length_b"] = "4.1"
+    assert cif["_cell_length_b"] == "4.1"
+
+    # Keys replaced without changing the number of pairs are also followed
+    value = cif.pairs.pop("_cell.length_a")
+    cif.pairs["_cell_length_q"] = value
+    assert cif["_cell_length_q"] == "3.6"
+    assert cif["_cell_length_a"] is None
+    assert cif.category("_cell").dtype.names[-1] == "_cell_length_q"
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_label_index(tmp_path, lazy):
+    fn = tmp_path / "labels.cif"
+    fn.write_text(
+        "data_x\n_cell_length_a 3.6\nloop_\n_a_x\n_a_y\n1 2\n3 4\n"
+        "loop_\n_b[1]\n_b[2]\n_A_Z\n5 6 7\n"
+    )
+    cif = CifFile(fn, lazy=lazy)
+
+    np.testing.assert_array_equal(cif.get_from_loops("_a_y"), [["2"], ["4"]])
+    np.testing.assert_array_equal(cif.get_from_loops("_a_z"), [["7"]])
+    first, second = cif.get_from_loops(["_a_z", "_a_x"])
+    np.testing.assert_array_equal(first, [["1"], ["3"]])
+    np.testing.assert_array_equal(second, [["7"]])
+    assert cif.get_from_loops("_a_w") is None
+
+    # Wildcard patterns are compiled once, with brackets matched literally
+    np.testing.assert_array_equal(cif.get_from_loops("_b[?]"), [["5", "6"]])
+    np.testing.assert_array_equal(cif.get_from_loops("_a_?"), [["1", "2"], ["3", "4"]])
+    assert cif._raw_keys("_b[?]") == ["_b[1]", "_b[2]"]
+    assert cif.get_from_pairs("_CELL*") == "3.6"
+
+    # Tables assigned in place are indexed by their new labels
+    cif.loops[0] = cif.loops[1]
+    assert cif.get_from_loops("_a_x") is None
+    first, second = cif.get_from_loops("_a_z")
+    np.testing.assert_array_equal(first, [["7"]])
+    np.testing.assert_array_equal(second, [["7"]])
+    assert [table.dtype.names for table in cif.category("_a")] == [("_A_Z",)] * 2
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_label_index_replaced_table(lazy):
+    fn = os.path.join(data_file_path, "AFLOW_mC24.cif")
+    cif = CifFile(fn, lazy=lazy)
+    expected = CifFile(fn, keys=["_symmetry_space_group_name_H-M"]).symops
+    assert cif["_space_group_symop_operation_xyz"] is not None
+
+    # Replacing the symops table falls back to the space group
+    cif.loops[1] = cif.loops[0]
+    assert cif["_space_group_symop_operation_xyz"] is None
+    np.testing.assert_array_equal(cif.symops, expected)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_category(tmp_path, lazy):
+    fn = tmp_path / "categories.cif"
+    fn.write_text(
+        "data_x\n_cell.length_a 3.6\n_cell.angle_alpha 90\n_cell_measurement.temp 290\n"
+        "_symmetry_space_group_name_H-M 'P 1'\nloop_\n_atom_site.id\n"
+        "_atom_site.fract_x\n1 0.5\n2 0.25\nloop_\n_symmetry_equiv_pos_site_id\n"
+        "_symmetry_equiv_pos_as_xyz\n1 x,y,z\n"
+    )
+    cif = CifFile(fn, lazy=lazy)
+
+    # mmCIF categories end at the "."
+    record = cif.category("_cell")
+    assert record.shape == (1, 1)
+    assert record.dtype.names == ("_cell.length_a", "_cell.angle_alpha")
+    assert record["_cell.length_a"] == "3.6"
+    assert cif.category("CELL_MEASUREMENT.")["_cell_measurement.temp"] == "290"
+
+    table = cif.category("atom_site")
+    assert table.dtype.names == ("_atom_site.id", "_atom_site.fract_x")
+    assert np.shares_memory(table, cif.loops[0])
+    np.testing.assert_array_equal(table["_atom_site.fract_x"], [["0.5"], ["0.25"]])
+
+    # CIF categories match any prefix of the data name
+    record, table = cif.category("_symmetry")
+    assert record.dtype.names == ("_symmetry_space_group_name_H-M",)
+    assert table is cif.loops[1]
+    assert cif.category("_symmetry_equiv_pos") is cif.loops[1]
+    assert cif.category("_atom") is None
+
+    # The index follows keys added to the pairs
+    cif.pairs["_cell.length_b"] = "4.1"
+    assert cif.category("_cell").dtype.names[-1] == "_cell.length_b"
+
+    typed = CifFile(fn, lazy=lazy, typed_loops=True)
+    assert typed.category("_cell")["_cell.angle_alpha"].dtype == np.int64
+    assert typed.category("_atom_site")["_atom_site.fract_x"].dtype == np.float64
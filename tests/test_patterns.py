@@ -1,7 +1,10 @@
+from fractions import Fraction
+
 import numpy as np
 import pytest
 from conftest import cif_files_mark
 
+import parsnip.patterns
 from parsnip.patterns import (
     _box_from_lengths_and_angles,
     _dtype_from_int,
@@ -11,6 +14,7 @@ from parsnip.patterns import (
     _strip_quotes,
     _try_cast_to_numeric,
     _write_debug_output,
+    parse_numeric,
 )
 
 BOX_ATOL = 8e-7
@@ -183,6 +187,81 @@ def test_try_cast_to_numeric(s):
         assert isinstance(result, int)
 
 
+NUMBERS = [
+    *["0", "-0", "+7", "1.", ".5", "-.25", "01.2", "1999", "3.14159265358979"],
+    *["8.9(1)", "33(45)", "1.234(5)", "-2.5e-10(12)", "12.3E4(12)", "1e+3", "1E-3"],
+    *["1.5(3", "0.00000000000000000000000001", "12345678901234567890"],
+    *["1.2345678901234567(8)", "7e0022"],
+]
+FLOAT_ONLY_NUMBERS = ["nan", "inf", "1e400", "1_000"]
+FRACTIONS = ["1/3", "-2/3", "-0/1", "007/10"]
+
+
+@pytest.mark.parametrize("repeats", [1, 8])  # Parse directly, or column by column
+@pytest.mark.parametrize("handle_fractions", [False, True])
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_parse_numeric(dtype, handle_fractions, repeats):
+    strings = [*NUMBERS, *(FRACTIONS if handle_fractions else FLOAT_ONLY_NUMBERS)]
+    strings *= repeats
+    with np.errstate(over="ignore"):
+        values, uncertainties = parse_numeric(
+            strings, dtype, handle_fractions=handle_fractions
+        )
+    for string, value, uncertainty in zip(strings, values, uncertainties, strict=True):
+        number, _, digits = string.partition("(")
+        expected = dtype(Fraction(number) if handle_fractions else number)
+        np.testing.assert_equal(value, expected, err_msg=string)
+        assert np.signbit(value) == np.signbit(expected), string
+        if digits.endswith(")"):
+            decimals = len(number.lower().partition("e")[0].partition(".")[2])
+            exponent = int(number.lower().partition("e")[2] or 0)
+            assert uncertainty == pytest.approx(
+                int(digits[:-1]) * 10.0 ** (exponent - decimals)
+            ), string
+        else:
+            assert np.isnan(uncertainty), string
+
+
+def test_parse_numeric_round_trip():
+    rng = np.random.default_rng(seed=0)
+    values = rng.standard_normal(10_000) * 10.0 ** rng.integers(-12, 12, 10_000)
+    for precision in [3, 8, 15]:
+        strings = np.array([f"{v:.{precision}g}" for v in values])
+        np.testing.assert_array_equal(parse_numeric(strings)[0], strings.astype(float))
+    strings = np.array([repr(float(v)) for v in values])
+    np.testing.assert_array_equal(parse_numeric(strings)[0], values)
+
+
+def test_parse_numeric_inputs():
+    for repeats in [1, 32]:
+        strings = np.array([[b"1(2)", b"2"], [b"3", b"4"]] * repeats)
+        values, uncertainties = parse_numeric(strings)
+        np.testing.assert_array_equal(values, [[1, 2], [3, 4]] * repeats)
+        np.testing.assert_array_equal(
+            uncertainties, [[2, np.nan], [np.nan, np.nan]] * repeats
+        )
+    np.testing.assert_array_equal(parse_numeric(["1.5", None])[0], [1.5, np.nan])
+    np.testing.assert_array_equal(parse_numeric(np.arange(3))[0], [0.0, 1.0, 2.0])
+    assert parse_numeric([])[0].shape == (0,)
+    with pytest.raises(ValueError, match="could not convert"):
+        parse_numeric(["1.0", "abc"])
+    with pytest.raises(ValueError, match="could not convert"):
+        parse_numeric(["1/3"])
+    with pytest.raises(ZeroDivisionError):
+        parse_numeric(["1/0"], handle_fractions=True)
+
+
+def test_parse_numeric_small_arrays(monkeypatch):
+    # Numbers in small arrays are parsed in one pass, without building a Fraction
+    monkeypatch.setattr(parsnip.patterns, "Fraction", None)
+    values, uncertainties = parse_numeric(
+        ["1/3", "-0", "0.25(3)", "-2.5e-10(12)"], handle_fractions=True
+    )
+    np.testing.assert_array_equal(values, [1 / 3, 0.0, 0.25, -2.5e-10])
+    assert not np.signbit(values[1])
+    np.testing.assert_allclose(uncertainties, [np.nan, np.nan, 0.03, 1.2e-10])
+
+
 @cif_files_mark
 def test_repr(cif_data):
     import re
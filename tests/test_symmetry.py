@@ -1,21 +1,53 @@
-import json
+from fractions import Fraction
 from pathlib import Path
 
 import numpy as np
 import pytest
 
 import parsnip
+import parsnip.patterns
 from parsnip import CifFile
-from parsnip.patterns import SYMOPS_BY_HALL, SYMOPS_BY_HM, SYMOPS_BY_INTL, _normalize
+from parsnip.patterns import (
+    SYMOPS_BY_HALL,
+    SYMOPS_BY_HM,
+    SYMOPS_BY_INTL,
+    _apply_scaled_symops,
+    _apply_symops,
+    _find_setting,
+    _fraction_array,
+    _normalize,
+    _parse_symop,
+    _safe_eval,
+    _scaled_sites,
+    _setting_symops,
+    _snap_position,
+    _spacegroup_operators,
+    _symop_operators,
+    symop_cache_info,
+)
 
 # Load reference data, relative to the main package installation
-SYMOPS_PATH = Path(parsnip.__file__).parent / "symops.json"
-with open(SYMOPS_PATH) as f:
-    RAW_DATA = json.load(f)
+SPACEGROUPS = np.load(Path(parsnip.__file__).parent / "spacegroups.npy")
+SETTING_SYMOPS = np.load(Path(parsnip.__file__).parent / "spacegroup_symops.npy")
+SYMOP_TABLE = np.load(Path(parsnip.__file__).parent / "symops.npy")
+RAW_DATA = {
+    setting["hall"].decode(): {
+        "table_number": setting["table_number"].decode(),
+        "hermann_mauguin_short": setting["hermann_mauguin_short"].decode(),
+        "hermann_mauguin_full": setting["hermann_mauguin_full"].decode(),
+        "is_default_setting": bool(setting["is_default_setting"]),
+        "symops": SYMOP_TABLE["symop"][
+            SETTING_SYMOPS[setting["start"] : setting["stop"]]
+        ]
+        .astype(str)
+        .tolist(),
+    }
+    for setting in SPACEGROUPS
+}
 
 
 def lookup_test_cases():
-    """Construct all possible space group queries from `symops.json`."""
+    """Construct all possible space group queries from the space group database."""
     cases = []
 
     # Hall Symbols
@@ -86,6 +118,22 @@ def test_database_correct_size():
     assert len(SYMOPS_BY_HM) == 661
 
 
+@pytest.mark.parametrize(
+    ("column", "table"),
+    [
+        ("hall", SYMOPS_BY_HALL),
+        ("hm_keys", SYMOPS_BY_HM),
+        ("table_number", SYMOPS_BY_INTL),
+    ],
+)
+def test_find_setting(column, table):
+    for key, symops in table.items():
+        setting = _find_setting(column, key)
+        np.testing.assert_array_equal(_setting_symops(setting), symops)
+    assert _find_setting(column, "not a space group") is None
+    assert _find_setting(column, "P 2ü") is None
+
+
 def test_single_default_setting():
     default_counts = {str(i): 0 for i in range(1, 231)}
 
@@ -95,3 +143,127 @@ def test_single_default_setting():
             default_counts[table_num] = default_counts.get(table_num, 0) + 1
 
     np.testing.assert_array_equal([default_counts[str(i)] for i in range(1, 231)], 1)
+
+
+@pytest.mark.parametrize(
+    ("symop", "rotation", "translation"),
+    [
+        ("x,y,z", [[1, 0, 0], [0, 1, 0], [0, 0, 1]], [0, 0, 0]),
+        ("'-y+1/2, x-y, z'", [[0, -1, 0], [1, -1, 0], [0, 0, 1]], ["1/2", 0, 0]),
+        ("1/3+X,+Y,2*z-0.25", [[1, 0, 0], [0, 1, 0], [0, 0, 2]], ["1/3", 0, "-1/4"]),
+    ],
+)
+def test_parse_symop(symop, rotation, translation):
+    parsed_rotation, parsed_translation = _parse_symop(symop)
+    assert parsed_rotation == tuple(map(tuple, rotation))
+    assert parsed_translation == tuple(Fraction(t) for t in translation)
+
+
+@pytest.mark.parametrize("setting", range(len(SPACEGROUPS)))
+def test_spacegroup_operators(setting):
+    rotations, translations = _spacegroup_operators(setting)
+    start, stop = SPACEGROUPS[setting][["start", "stop"]]
+    expected_rotations, expected_translations = _symop_operators(
+        SYMOP_TABLE["symop"][SETTING_SYMOPS[start:stop]].astype(str)
+    )
+    np.testing.assert_array_equal(rotations, expected_rotations)
+    np.testing.assert_array_equal(translations, expected_translations)
+
+
+@pytest.mark.parametrize("symop", ["x,y", "x,y,q", "x,,z", "x,y,z/2", "x,y,1/0+z"])
+def test_parse_symop_invalid(symop):
+    with pytest.raises(ValueError, match="Symmetry operation"):
+        _parse_symop(symop)
+
+
+@pytest.mark.parametrize("hall", SYMOPS_BY_HALL.keys())
+def test_apply_symops(hall):
+    symops = SYMOPS_BY_HALL[hall]
+    sites = np.array([["0.125", "-0.3(2)", "2/3"], ["0.75", "0.5", "0"]])
+    rotations, translations = _symop_operators(symops)
+    symops_str = np.array2string(np.array(symops), separator=",", threshold=np.inf)
+
+    expected = np.vstack(
+        [_safe_eval(symops_str, *xyz, parse_mode="rational") for xyz in sites]
+    )
+    rational = _apply_symops(rotations, translations, _fraction_array(sites))
+    np.testing.assert_array_equal(rational, expected)
+
+    floats = _apply_symops(
+        rotations, translations, _fraction_array(sites).astype(float), "python_float"
+    )
+    np.testing.assert_allclose(floats % 1, expected, atol=1e-12)
+
+
+@pytest.mark.parametrize("snap_fractions", [True, False])
+@pytest.mark.parametrize(
+    "sites",
+    [
+        [["0.3333", "-0.6667", "1/4"], ["0.125", "0.2(1)", "1.50"]],
+        [["0.1667", "0.3333", "0.0833"], ["0.41667", "0.8333", "-0.9167"]],
+        [["0.3334", "0.6666", "0.3333(4)"], ["0.2", "0.4", ".5"]],
+        [["0.33", "-0.333", "0.12345678"], ["5.", "+0.6667", "2/3"]],
+    ],
+)
+def test_scaled_sites(sites, snap_fractions):
+    sites = np.array(sites)
+    coords = (
+        np.array([_snap_position(row) for row in sites]) if snap_fractions else sites
+    )
+    scaled, denominator = _scaled_sites(sites, snap_fractions)
+    assert scaled.dtype == np.int64
+    np.testing.assert_array_equal(
+        scaled.astype(object) / Fraction(denominator), _fraction_array(coords)
+    )
+
+    symops = max(SYMOPS_BY_HALL.values(), key=len)
+    rotations, translations = _symop_operators(symops)
+    np.testing.assert_array_equal(
+        _apply_scaled_symops(rotations, translations, scaled, denominator),
+        _apply_symops(rotations, translations, _fraction_array(coords)),
+    )
+
+
+@pytest.mark.parametrize("entry", ["1e-3", "?", ".", "1/0", "x"])
+def test_scaled_sites_fallback(entry):
+    assert _scaled_sites(np.array([["0.5", "0.5", entry]])) is None
+
+
+def test_symop_operators_cached():
+    symops = ["x, y, z", "-y+1/2, x, 'z'"]
+    rotations, translations = _symop_operators(symops)
+    before = symop_cache_info()["operators"]
+
+    cached = _symop_operators(np.array(["X,Y,Z", "-y+1/2,x,z"]))
+    assert cached[0] is rotations
+    assert cached[1] is translations
+    assert symop_cache_info()["operators"].hits == before.hits + 1
+    assert symop_cache_info()["operators"].misses == before.misses
+    assert not rotations.flags.writeable
+    assert not translations.flags.writeable
+
+
+def test_build_unit_cell_database_operators():
+    cif_content = (
+        "data_test\n_symmetry_space_group_name_H-M 'F m -3 m'\n"
+        "loop_\n_atom_site_fract_x\n_atom_site_fract_y\n_atom_site_fract_z\n0 0 0"
+    )
+    with pytest.warns(RuntimeWarning, match="File input was parsed"):
+        cif = CifFile(cif_content)
+    before = symop_cache_info()
+
+    np.testing.assert_array_equal(
+        cif.build_unit_cell(),
+        [[0.0, 0.0, 0.0], [0.0, 0.5, 0.5], [0.5, 0.0, 0.5], [0.5, 0.5, 0.0]],
+    )
+    after = symop_cache_info()
+    assert after["operators"] == before["operators"]  # No operations were parsed
+    assert after["spacegroups"].hits + after["spacegroups"].misses == (
+        before["spacegroups"].hits + before["spacegroups"].misses + 1
+    )
+
+
+def test_symops_tables_built_once():
+    assert parsnip.patterns.SYMOPS_BY_HALL is SYMOPS_BY_HALL
+    with pytest.raises(AttributeError, match="SYMOPS_BY_NAME"):
+        _ = parsnip.patterns.SYMOPS_BY_NAME
@@ -13,6 +13,12 @@ from conftest import (
 )
 from more_itertools import flatten
 
+import parsnip.parsnip
+from parsnip import CifFile
+from parsnip._errors import ParseWarning
+from parsnip.parsnip import _count_table_entries, _iter_table_entries, _scan_buffer
+from parsnip.patterns import cast_array_to_float
+
 STR_WIDTH_MAX = 128
 """Maximum width for valid fields in the test suite.
 Used to simplify processing of structured arrays.
@@ -120,6 +126,316 @@ def test_partial_table_read(cif_data, subset):
     np.testing.assert_array_equal(parsnip_data, gemmi_data)
 
 
+@cif_files_mark
+@pytest.mark.parametrize("lazy", [False, True])
+@pytest.mark.parametrize("chunk_rows", [1, 5, 65536])
+@pytest.mark.filterwarnings("ignore:Duplicate key:parsnip._errors.ParseWarning")
+def test_iter_loop_chunks(cif_data, lazy, chunk_rows):
+    cif = CifFile(cif_data.filename, lazy=lazy)
+    all_labels = cif_data.file.loop_labels
+    for i, table in enumerate(cif_data.file.loops):
+        label = table.dtype.names[-1]
+        if any(label in labels for labels in all_labels[:i]):
+            continue  # Chunks are read from the first matching table
+        chunks = [*cif.iter_loop_chunks(label, chunk_rows=chunk_rows)]
+
+        assert all(len(chunk) <= chunk_rows for chunk in chunks)
+        assert all(chunk.dtype.names == table.dtype.names for chunk in chunks)
+        assert [tuple(row[0]) for chunk in chunks for row in chunk] == [
+            tuple(row[0]) for row in table
+        ]
+    if lazy:  # Iterating over chunks should not build the table
+        assert all(isinstance(table, tuple) for table in cif._loops)
+
+
+def test_iter_loop_chunks_invalid():
+    assert [*bad_cif.file.iter_loop_chunks("_this_key_does_not_exist")] == []
+    with pytest.raises(ValueError, match="chunk_rows must be positive"):
+        next(bad_cif.file.iter_loop_chunks("_atom_site*", chunk_rows=0))
+
+
+@all_files_mark
+@pytest.mark.parametrize("encode", [False, True])
+def test_count_table_entries(cif_data, monkeypatch, encode):
+    monkeypatch.setattr(parsnip.parsnip, "_COUNT_BLOCK_SIZE", 64)
+    with open(cif_data.filename, "rb" if encode else "r") as f:
+        buf = f.read()
+    cpat = cif_data.file._cpat
+    for kind, _, *event in _scan_buffer(buf, cpat):
+        if kind == "loop":
+            _, start, stop = event
+            entries = _iter_table_entries(buf, start, stop, cpat)
+            n_entries = _count_table_entries(buf, start, stop, cpat)
+            assert n_entries == sum(map(len, entries))
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+@pytest.mark.parametrize(
+    ("body", "message"),
+    [("1 2\n3 4\n5\n", "cannot be resolved"), ("", "Loop data is empty")],
+)
+def test_iter_loop_chunks_malformed(tmp_path, lazy, body, message):
+    path = tmp_path / "malformed.cif"
+    path.write_text(f"data_a\nloop_\n_x\n_y\n{body}loop_\n_x\n_z\n6 7\n")
+
+    # Tables skipped by loops are skipped with the same warning, before any chunk
+    with pytest.warns(ParseWarning, match=message):
+        chunks = [*CifFile(path, lazy=lazy).iter_loop_chunks("_x", chunk_rows=1)]
+    assert [chunk.tolist() for chunk in chunks] == [[[("6", "7")]]]
+    with pytest.raises(ValueError, match=message):
+        next(CifFile(path, lazy=True, strict=True).iter_loop_chunks("_x"))
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_iter_loop_chunks_typed(tmp_path, lazy):
+    path = tmp_path / "typed.cif"
+    path.write_text(
+        "data_typed\nloop_\n_id\n_x\n_y\n"
+        "0 1.5(2) 1\n1 2 2\n2 ? 3\n3 4 4\n? 5 5\nabc 6(1) 6\n"
+    )
+    table = CifFile(path, typed_loops=True).loops[0]
+    cif = CifFile(path, lazy=lazy, typed_loops=True)
+    chunks = [*cif.iter_loop_chunks("_x", chunk_rows=2, return_uncertainties=True)]
+
+    # Each chunk has the column types of the whole table, not of its own entries
+    for chunk, _ in chunks:
+        assert "".join(chunk.dtype[label].kind for label in chunk.dtype.names) == "Ufi"
+    for label in table.dtype.names:
+        rows = np.concatenate([chunk[label] for chunk, _ in chunks])
+        np.testing.assert_array_equal(rows, table[label])
+
+    # Uncertainties are given for every chunk of a column with any uncertainties
+    assert all(sigma.keys() == {"_x"} for _, sigma in chunks)
+    np.testing.assert_array_equal(
+        np.concatenate([sigma["_x"] for _, sigma in chunks]), cif.uncertainties[0]["_x"]
+    )
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_uncertainties_shared_labels(tmp_path, lazy):
+    path = tmp_path / "blocks.cif"
+    path.write_text(
+        "data_a\nloop_\n_x\n_l\n1.5(2) a\n2.5(3) b\ndata_b\nloop_\n_x\n_l\n7.5(9) c\n"
+    )
+    cif = CifFile(path, lazy=lazy, typed_loops=True)
+
+    # Each table keeps the uncertainties of its own columns
+    chunks = [*cif.iter_loop_chunks("_x", chunk_rows=1, return_uncertainties=True)]
+    assert [sigma["_x"].tolist() for _, sigma in chunks] == [[[0.2]], [[0.3]]]
+    assert [sigma["_x"].squeeze(1).tolist() for sigma in cif.uncertainties] == [
+        [0.2, 0.3],
+        [0.9],
+    ]
+
+    # Tables replaced through loops have no uncertainties
+    cif.loops.reverse()
+    assert [sigma["_x"].shape for sigma in cif.uncertainties] == [(1, 1), (2, 1)]
+    cif.loops[0] = cif.loops[0].copy()
+    assert cif.uncertainties[0] == {}
+
+
+@cif_files_mark
+@pytest.mark.parametrize("engine", ["buffer", "line"])
+@pytest.mark.filterwarnings("ignore:Duplicate key:parsnip._errors.ParseWarning")
+def test_typed_loops(cif_data, engine):
+    typed = CifFile(cif_data.filename, engine=engine, typed_loops=True)
+    assert typed.loop_labels == cif_data.file.loop_labels
+
+    for table, raw in zip(typed.loops, cif_data.file.loops, strict=True):
+        for label in table.dtype.names:
+            if table[label].dtype.kind == "U":
+                np.testing.assert_array_equal(table[label], raw[label])
+                continue
+            expected = np.where(np.isin(raw[label], [".", "?"]), "nan", raw[label])
+            np.testing.assert_array_equal(
+                table[label], cast_array_to_float(expected, dtype=np.float64)
+            )
+
+    np.testing.assert_array_equal(
+        typed.wyckoff_positions, cif_data.file.wyckoff_positions
+    )
+
+
+def test_typed_loops_uncertainties(tmp_path):
+    path = tmp_path / "typed.cif"
+    path.write_text(
+        "data_typed\nloop_\n_id\n_x\n_y\n_label\n"
+        "1 1.234(5) 1.5e3(12) a\n2 ? -2 'b c'\n3 0.25 . 4\n"
+    )
+    typed = CifFile(path, typed_loops=True)
+    (table,) = typed.loops
+
+    assert table.dtype["_id"] == np.int64
+    assert table.dtype["_x"] == table.dtype["_y"] == np.float64
+    assert table.dtype["_label"].kind == "U"
+    np.testing.assert_array_equal(table["_x"].squeeze(), [1.234, np.nan, 0.25])
+    np.testing.assert_array_equal(table["_y"].squeeze(), [1500.0, -2.0, np.nan])
+
+    (uncertainties,) = typed.uncertainties
+    assert uncertainties.keys() == {"_x", "_y"}
+    np.testing.assert_allclose(uncertainties["_x"].squeeze(), [0.005, *[np.nan] * 2])
+    np.testing.assert_allclose(uncertainties["_y"].squeeze(), [1.2e3, *[np.nan] * 2])
+    assert CifFile(path).uncertainties == [{}]
+
+
+@cif_files_mark
+@pytest.mark.parametrize("string_storage", ["unicode", "bytes"])
+@pytest.mark.filterwarnings("ignore:Duplicate key:parsnip._errors.ParseWarning")
+def test_string_storage(cif_data, string_storage):
+    cif = CifFile(cif_data.filename, string_storage=string_storage)
+    for table, raw in zip(cif.loops, cif_data.file.loops, strict=True):
+        for label in table.dtype.names:
+            column = table[label]
+            expected_kind = "S" if all(map(str.isascii, raw[label].ravel())) else "U"
+            assert column.dtype.kind == (
+                expected_kind if string_storage == "bytes" else "U"
+            )
+            assert column.dtype.itemsize // (4 if column.dtype.kind == "U" else 1) == (
+                max(np.char.str_len(raw[label]).max(), 1)
+            )
+            np.testing.assert_array_equal(column.astype(str), raw[label])
+
+    if cif_data.file.symops is not None:
+        np.testing.assert_array_equal(cif.symops, cif_data.file.symops)
+
+
+@cif_files_mark
+@pytest.mark.skipif(
+    not CifFile._STRINGDTYPE_AVAILABLE, reason="StringDType requires NumPy 2."
+)
+@pytest.mark.filterwarnings("ignore:Duplicate key:parsnip._errors.ParseWarning")
+def test_string_storage_stringdtype(cif_data):
+    cif = CifFile(cif_data.filename, string_storage="stringdtype")
+    assert cif.loop_labels == cif_data.file.loop_labels
+
+    for table, raw in zip(cif.loops, cif_data.file.loops, strict=True):
+        assert table.dtype == np.dtypes.StringDType()
+        np.testing.assert_array_equal(
+            table.astype(object), CifFile.structured_to_unstructured(raw).squeeze(1)
+        )
+        for label in raw.dtype.names:
+            np.testing.assert_array_equal(
+                cif.get_from_loops(label), cif_data.file.get_from_loops(label)
+            )
+
+    if cif_data.file.symops is not None:
+        np.testing.assert_array_equal(cif.symops, cif_data.file.symops)
+
+
+@cif_files_mark
+@pytest.mark.parametrize(
+    "categorical", [True, ["_atom_site*", "_symmetry_equiv_pos_as_xyz"]]
+)
+@pytest.mark.filterwarnings("ignore:Duplicate key:parsnip._errors.ParseWarning")
+def test_categorical(cif_data, categorical):
+    cif = CifFile(cif_data.filename, categorical=categorical)
+    assert cif.loop_labels == cif_data.file.loop_labels
+
+    n_encoded = 0
+    for table, raw in zip(cif.loops, cif_data.file.loops, strict=True):
+        for label in table.dtype.names:
+            np.testing.assert_array_equal(
+                cif.get_from_loops(label), cif_data.file.get_from_loops(label)
+            )
+            encoded = cif.get_categorical(label)
+            if table.dtype[label].kind != "u":
+                assert encoded is None
+                continue
+            n_encoded += 1
+            codes, values = encoded
+            assert codes.dtype.metadata is None
+            np.testing.assert_array_equal(values, np.unique(raw[label]))
+            np.testing.assert_array_equal(values[codes], raw[label])
+
+    if categorical is not True:
+        assert n_encoded == sum(
+            label.startswith("_atom_site") or label == "_symmetry_equiv_pos_as_xyz"
+            for label in flatten(cif.loop_labels)
+        )
+
+    np.testing.assert_array_equal(
+        cif.wyckoff_positions, cif_data.file.wyckoff_positions
+    )
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+@pytest.mark.parametrize("categorical", [True, ["_kind"]])
+@pytest.mark.parametrize("string_storage", ["unicode", "bytes"])
+def test_iter_loop_chunks_categorical(tmp_path, lazy, categorical, string_storage):
+    path = tmp_path / "categorical.cif"
+    kinds = ["Cu", "O", "O", "Cu", "O", "Zn", "O", "O"]
+    path.write_text(
+        "data_categorical\nloop_\n_id\n_kind\n"
+        + "".join(f"{i} {kind}\n" for i, kind in enumerate(kinds))
+    )
+    kwargs = {"categorical": categorical, "string_storage": string_storage}
+    table = CifFile(path, **kwargs).loops[0]
+    cif = CifFile(path, lazy=lazy, **kwargs)
+
+    # Every chunk is encoded with the categories of the whole table
+    chunks = [*cif.iter_loop_chunks("_kind", chunk_rows=3)]
+    for chunk in chunks:
+        assert chunk.dtype["_kind"] == table.dtype["_kind"]
+        np.testing.assert_array_equal(
+            chunk.dtype["_kind"].metadata["categories"],
+            table.dtype["_kind"].metadata["categories"],
+        )
+    np.testing.assert_array_equal(
+        np.concatenate([chunk["_kind"] for chunk in chunks]), table["_kind"]
+    )
+
+
+@cif_files_mark
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"typed_loops": True}, {"categorical": True}, {"string_storage": "bytes"}],
+)
+@pytest.mark.filterwarnings("ignore:Duplicate key:parsnip._errors.ParseWarning")
+def test_get_from_loops_views(cif_data, kwargs):
+    cif = CifFile(cif_data.filename, **kwargs)
+    for table, labels in zip(cif.loops, cif.loop_labels, strict=True):
+        for keys in (*labels, [*labels]):
+            view = cif.get_from_loops(keys, copy=False)
+            np.testing.assert_array_equal(view, cif.get_from_loops(keys))
+            shares_memory = np.shares_memory(view, table)
+            assert shares_memory != view.flags.writeable
+
+            # Single columns are viewed unless they must be decoded
+            if isinstance(keys, str):
+                assert shares_memory == (table.dtype[keys].metadata is None)
+
+        assert not np.shares_memory(cif.get_from_loops(labels), table)
+
+
+@pytest.mark.skipif(
+    not CifFile._STRINGDTYPE_AVAILABLE, reason="StringDType requires NumPy 2."
+)
+def test_get_from_loops_views_stringdtype(tmp_path):
+    path = tmp_path / "views.cif"
+    path.write_text("data_views\nloop_\n_a\n_b\n_c\n1 2 3\n4 5 6\n")
+    cif = CifFile(path, string_storage="stringdtype")
+    (table,) = cif.loops
+
+    for keys in (["_a", "_c"], ["_b", "_c"], "_b"):
+        view = cif.get_from_loops(keys, copy=False)
+        np.testing.assert_array_equal(view, cif.get_from_loops(keys))
+        assert np.shares_memory(view, table)
+        assert not view.flags.writeable
+
+    copied = cif.get_from_loops(["_c", "_a"], copy=False)
+    np.testing.assert_array_equal(copied, [["3", "1"], ["6", "4"]])
+    assert copied.flags.writeable
+
+
+def test_string_storage_invalid():
+    with pytest.raises(ValueError, match="String storage"):
+        CifFile(bad_cif.filename, string_storage="ascii")
+    with pytest.raises(ValueError, match="typed_loops is not supported"):
+        CifFile(bad_cif.filename, string_storage="stringdtype", typed_loops=True)
+    with pytest.raises(ValueError, match="categorical is not supported"):
+        CifFile(bad_cif.filename, string_storage="stringdtype", categorical=True)
+
+
 @pytest.mark.skip("Would be nice to pass, but we are at least as good as gemmi here.")
 def test_bad_cif_symop():
     parsnip_data = bad_cif.file.get_from_loops(bad_cif.symop_keys)
@@ -3,6 +3,7 @@ import warnings
 from contextlib import nullcontext
 from importlib.util import find_spec
 
+import gemmi
 import numpy as np
 import pytest
 from ase import io
@@ -17,6 +18,7 @@ from conftest import (
 from gemmi import cif
 from more_itertools import flatten
 
+import parsnip.parsnip
 from parsnip import CifFile
 from parsnip._errors import ParseWarning
 
@@ -31,6 +33,14 @@ def _gemmi_read_table(filename, keys):
 @all_files_mark
 def test_read_symops(cif_data):
     parsnip_symops = cif_data.file.symops
+    if parsnip_symops is not None and cif_data.file._symops_key == [""]:
+        # Operations were looked up from the space group, rather than read from a table
+        hm = cif_data.file["_symmetry_space_group_name_H-M"].strip("'")
+        gemmi_symops = gemmi.find_spacegroup_by_name(hm).operations()
+        assert sorted(
+            gemmi.Op(op).triplet() for op in parsnip_symops.ravel()
+        ) == sorted(op.triplet() for op in gemmi_symops)
+        return
     gemmi_symops = _gemmi_read_table(cif_data.filename, cif_data.file._symops_key)
     np.testing.assert_array_equal(parsnip_symops, gemmi_symops)
 
@@ -68,6 +78,25 @@ def test_build_unit_cell_errors(cif_data):
         cif_data.file.build_unit_cell(parse_mode="asdf")
 
 
+@pytest.mark.parametrize("parse_mode", ["python_float", "rational"])
+def test_build_unit_cell_invalid_site(tmp_path, monkeypatch, parse_mode):
+    path = tmp_path / "invalid.cif"
+    path.write_text(
+        "data_invalid\nloop_\n_symmetry_equiv_pos_as_xyz\nx,y,z\n-x,-y,-z\n"
+        "loop_\n_atom_site_fract_x\n_atom_site_fract_y\n_atom_site_fract_z\n"
+        "0.1 0.2 0.3\n0.1x 0.2 0.3\n"
+    )
+
+    # Invalid coordinates are reported directly, rather than evaluated as strings
+    def fail(*args, **kwargs):
+        raise AssertionError("Affine operations were evaluated as strings")
+
+    monkeypatch.setattr(parsnip.parsnip, "_compile_float_eval", fail)
+    monkeypatch.setattr(parsnip.parsnip, "_safe_eval", fail)
+    with pytest.raises(ValueError, match=r"0\.1x"):
+        CifFile(path).build_unit_cell(parse_mode=parse_mode)
+
+
 @cif_files_mark
 @pytest.mark.parametrize("n_decimal_places", [2, 3, 4, 5, 6, 9])
 @pytest.mark.parametrize("parse_mode", ["python_float", "sympy", "rational"])